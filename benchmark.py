@@ -0,0 +1,153 @@
+import json
+import logging as log
+import multiprocessing as mp
+import queue
+import os
+import resource
+import time
+
+import hydra
+import numpy as np
+from omegaconf import DictConfig, OmegaConf
+
+from src.estimators import FrameProcessor
+from src.video_capture import ReplayVideoCapture
+
+
+PERCENTILES = (50, 90, 99)
+
+
+def summarize(samples):
+    samples = np.asarray(samples) * 1e3
+    if samples.size == 0:
+        return None
+    summary = {"p{}".format(p): float(np.percentile(samples, p)) for p in PERCENTILES}
+    summary["mean"] = float(samples.mean())
+    return summary
+
+
+def load_frames(args: DictConfig):
+    # a recording with faces, so every stage of the graph runs and gets latency numbers
+    replay = ReplayVideoCapture(args.replay_path, realtime=False)
+    return [replay.color_frames[i] for i in range(replay.frames)]
+
+
+def configure(cfg: dict, precision: str, device: str):
+    cfg = OmegaConf.create(cfg)
+    cfg.device = device
+    for stage in cfg.frame_processor.stages.values():
+        cfg[stage.config].precision = precision
+    return cfg
+
+
+def missing_models(cfg: DictConfig):
+    """IR files of the stages that are not on disk, a model may be missing in some precisions."""
+    missing = []
+    for stage in cfg.frame_processor.stages.values():
+        path = cfg[stage.config].path
+        missing.extend(file for file in (path, os.path.splitext(path)[0] + ".bin") if not os.path.exists(file))
+    return missing
+
+
+def run_benchmark(cfg: dict, precision: str, device: str):
+    cfg = configure(cfg, precision, device)
+
+    frames = load_frames(cfg.benchmark)
+    frame_processor = FrameProcessor(cfg)
+    startup = {name: estimator.timings for name, estimator in frame_processor.estimators.items()}
+
+    stage_latency = {name: [] for name in frame_processor.estimators}
+    latency = []
+    faces = 0
+    total = cfg.benchmark.warmup + cfg.benchmark.frames
+    start = None
+    for i in range(total + frame_processor.pipeline_depth - 1):
+        if i == cfg.benchmark.warmup:
+            start = time.perf_counter()
+        if i < total:
+            processed = frame_processor.process_pipelined(frames[i % len(frames)], time.perf_counter())
+        else:
+            processed = next(frame_processor.flush())
+        if processed is None:
+            continue
+
+        frame_id, _, submitted, results = processed
+        if frame_id < cfg.benchmark.warmup:
+            continue
+        latency.append(time.perf_counter() - submitted)
+        faces += len(results[0])
+        for name, value in frame_processor.graph.timings.items():
+            # the stages after detection only run on faces, without them there is nothing to measure
+            if results[0] or frame_processor.graph.stages[name].is_root:
+                stage_latency[name].append(value)
+    elapsed = time.perf_counter() - start
+    if not faces:
+        log.warning('No faces in {}, only the stages fed by the frame were measured'.format(cfg.benchmark.replay_path))
+
+    return {
+        "precision": precision,
+        "device": device,
+        "pipeline_depth": frame_processor.pipeline_depth,
+        "frames": len(latency),
+        "faces_per_frame": faces / max(len(latency), 1),
+        "throughput_fps": len(latency) / elapsed,
+        "latency_ms": summarize(latency),
+        "stage_latency_ms": {name: summarize(values) for name, values in stage_latency.items()},
+        "startup_s": startup,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def _worker(cfg, precision, device, results):
+    try:
+        results.put(run_benchmark(cfg, precision, device))
+    except Exception as e:
+        results.put({"precision": precision, "device": device, "error": repr(e)})
+
+
+def _collect(process, results, precision, device, timeout):
+    # a child killed by a signal (a segfault or the OOM killer during compilation) never puts its result
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return results.get(timeout=1)
+        except queue.Empty:
+            pass
+        if not process.is_alive():
+            try:
+                return results.get(timeout=1)
+            except queue.Empty:
+                error = "benchmark process exited with code {}".format(process.exitcode)
+                return {"precision": precision, "device": device, "error": error}
+        if time.monotonic() > deadline:
+            process.terminate()
+            return {"precision": precision, "device": device, "error": "timed out after {} s".format(timeout)}
+
+
+@hydra.main(config_path="conf", config_name="benchmark")
+def main(cfg: DictConfig) -> None:
+    # every configuration runs in a fresh process, so its peak RSS is not inflated by the previous ones
+    context = mp.get_context("spawn")
+    container = OmegaConf.to_container(cfg, resolve=False)
+    report = []
+    for device in cfg.benchmark.devices:
+        for precision in cfg.benchmark.precisions:
+            missing = missing_models(configure(container, precision, device))
+            if missing:
+                report.append({"precision": precision, "device": device,
+                               "skipped": "missing model files: {}".format(", ".join(missing))})
+                print(json.dumps(report[-1]))
+                continue
+            results = context.Queue()
+            process = context.Process(target=_worker, args=(container, precision, device, results))
+            process.start()
+            report.append(_collect(process, results, precision, device, cfg.benchmark.timeout))
+            process.join()
+            print(json.dumps(report[-1]))
+
+    with open(cfg.benchmark.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
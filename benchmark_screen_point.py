@@ -0,0 +1,83 @@
+import argparse
+import time
+
+from hydra.utils import instantiate
+from omegaconf import OmegaConf
+from sklearn.model_selection import train_test_split
+
+from src.data_collector import DataCollector
+from src.estimators import ScreenPointEstimatorCatboost
+from src.estimators.screen_point_estimator import multi_rmse
+
+
+def latency(func, X, repeat):
+    func(X)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(X)
+    return (time.perf_counter() - start) / repeat
+
+
+def compare_predict_paths(data_collector, args):
+    estimator = ScreenPointEstimatorCatboost(use_best_model=True, early_stopping_rounds=10,
+                                             iterations=args.iterations, random_strength=1, verbose=0)
+    estimator.fit(data_collector.data, data_collector.target_columns)
+    X = data_collector.data.drop(columns=data_collector.target_columns).values
+
+    print("trees: {}, compiled: {}".format(estimator.regressor.tree_count_, estimator._predictor is not None))
+    for batch_size in args.batch_sizes:
+        batch = X[:batch_size]
+        pool = latency(estimator.predict_pool, batch, args.repeat)
+        fast = latency(estimator.predict, batch, args.repeat)
+        print("batch {:3d}: Pool {:8.1f} us, fast path {:8.1f} us ({:.1f}x)".format(
+            batch_size, pool * 1e6, fast * 1e6, pool / fast))
+
+
+def compare_estimators(data_collector, args):
+    # every estimator is fitted on the same rows (with its own inner validation split) and scored on the same test rows
+    df = data_collector.data
+    train, test = train_test_split(df, test_size=args.test_size, random_state=0)
+    X_test, y_test = test.drop(columns=data_collector.target_columns).values, test[data_collector.target_columns].values
+
+    print("{:>10} {:>12} {:>16} {:>12}".format("estimator", "fit, s", "predict 1, us", "test RMSE"))
+    for name in args.estimators:
+        config = OmegaConf.load("conf/screen_point_estimator/{}.yaml".format(name))
+        overrides = [override.partition(".")[2] for override in args.set if override.startswith(name + ".")]
+        config = OmegaConf.merge(config, OmegaConf.from_dotlist(overrides))
+        estimator = instantiate(config)
+        start = time.perf_counter()
+        estimator.fit(train, data_collector.target_columns)
+        fit_time = time.perf_counter() - start
+        predict_time = latency(estimator.predict, X_test[:1], args.repeat)
+        rmse = multi_rmse(y_test, estimator.predict(X_test))
+        print("{:>10} {:12.3f} {:16.1f} {:12.3f}".format(name, fit_time, predict_time * 1e6, rmse))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fit time, per-call latency and accuracy of the screen-point "
+                                                 "estimators")
+    parser.add_argument("--data", nargs="+", default=["data/*.csv"])
+    parser.add_argument("--estimators", nargs="+", default=["catboost", "ridge", "knn", "geometric"],
+                        help="configs in conf/screen_point_estimator")
+    parser.add_argument("--set", nargs="+", metavar="NAME.KEY=VALUE",
+                        default=["catboost.verbose=0", "catboost.random_seed=0", "ridge.seed=0", "knn.seed=0",
+                                 "geometric.seed=0"],
+                        help="overrides of the estimator configs")
+    parser.add_argument("--test-size", type=float, default=0.2)
+    parser.add_argument("--predict-paths", action="store_true",
+                        help="compare the CatBoost Pool and fast predict paths instead")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[1, 4, 16])
+    parser.add_argument("--repeat", type=int, default=500)
+    args = parser.parse_args()
+
+    data_collector = DataCollector()
+    data_collector.ingest(args.data)
+    if args.predict_paths:
+        compare_predict_paths(data_collector, args)
+    else:
+        compare_estimators(data_collector, args)
+
+
+if __name__ == "__main__":
+    main()
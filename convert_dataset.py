@@ -0,0 +1,42 @@
+import argparse
+import time
+from pathlib import Path
+
+from src.data_collector import DataCollector
+from src.data_collector.dataset_io import NPY_SUFFIX
+
+
+def timed(func, *args, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert CSV datasets to the memory-mappable .npy format")
+    parser.add_argument("paths", nargs="+", type=Path)
+    parser.add_argument("--benchmark", action="store_true", help="compare load/save times of both formats")
+    args = parser.parse_args()
+
+    for path in args.paths:
+        output = path.with_suffix(NPY_SUFFIX)
+        data_collector = DataCollector()
+        data_collector.load(path)
+        data_collector.save(output)
+        print("{} -> {} ({} rows)".format(path, output, data_collector.num_collected))
+
+        if args.benchmark:
+            tmp = path.with_suffix(".tmp" + path.suffix)
+            for source in (path, output):
+                load_time = timed(data_collector.load, source)
+                save_time = timed(data_collector.save, tmp.with_suffix(source.suffix))
+                tmp.with_suffix(source.suffix).unlink()
+                print("  {:4s} load {:7.2f} ms, save {:7.2f} ms, {:8d} bytes".format(
+                    source.suffix[1:], load_time * 1e3, save_time * 1e3, source.stat().st_size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+import json
+
+import hydra
+from omegaconf import DictConfig, OmegaConf
+
+from src.data_collector import DataCollector
+from src.training import HyperparameterSearch
+
+
+@hydra.main(config_path="conf", config_name="search")
+def main(cfg: DictConfig) -> None:
+    data_collector = DataCollector()
+    data_collector.ingest(list(cfg.search.data))
+
+    search = HyperparameterSearch(
+        OmegaConf.to_container(cfg.screen_point_estimator),
+        OmegaConf.to_container(cfg.search.space),
+        n_iter=cfg.search.n_iter,
+        n_folds=cfg.search.n_folds,
+        n_jobs=cfg.search.n_jobs,
+        early_stopping_size=cfg.search.early_stopping_size,
+        seed=cfg.search.seed,
+    )
+    report = search.run(data_collector.data, data_collector.target_columns)
+
+    for result in report["results"]:
+        print("val RMSE {:8.3f} +- {:6.3f}, {:7.1f} CPU s, {}".format(
+            result["val_rmse"], result["val_rmse_std"], result["cpu_seconds"], result["params"]))
+    print("best: {} (val RMSE {:.3f}), {:.1f} s wall, {:.2f} CPU h".format(
+        report["best_params"], report["best_val_rmse"], report["wall_seconds"], report["cpu_seconds"] / 3600))
+    print(OmegaConf.to_yaml(report["best_config"]))
+
+    with open(cfg.search.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
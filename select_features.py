@@ -0,0 +1,36 @@
+import hydra
+from omegaconf import DictConfig, OmegaConf
+
+from src.data_collector import DataCollector, write_feature_schema
+from src.training import FeatureSelection
+
+
+@hydra.main(config_path="conf", config_name="select_features")
+def main(cfg: DictConfig) -> None:
+    data_collector = DataCollector()
+    data_collector.ingest(list(cfg.feature_selection.data))
+
+    selection = FeatureSelection(
+        OmegaConf.to_container(cfg.screen_point_estimator),
+        data_collector.features.raw_columns,
+        method=cfg.feature_selection.method,
+        sizes=list(cfg.feature_selection.sizes),
+        tolerance=cfg.feature_selection.tolerance,
+        keep=list(cfg.feature_selection.keep),
+        n_repeats=cfg.feature_selection.n_repeats,
+        test_size=cfg.feature_selection.test_size,
+        seed=cfg.feature_selection.seed,
+    )
+    report = selection.run(data_collector.data, data_collector.target_columns)
+
+    print("{:>9} {:>10} {:>12} {:>10}".format("features", "fit, s", "per row, us", "val RMSE"))
+    for result in report["results"]:
+        print("{features:9d} {fit_seconds:10.2f} {row_us:12.1f} {val_rmse:10.3f}".format(**result))
+    print("selected {} features, test RMSE {:.3f}, written to {}".format(
+        len(report["feature_names"]), report["test"]["test_rmse"], cfg.feature_selection.output))
+
+    write_feature_schema(cfg.feature_selection.output, report.pop("feature_names"), **report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import logging as log
+import time
+
+import hydra
+from omegaconf import DictConfig, OmegaConf
+
+from src.data_collector import DataCollector, read_feature_schema
+from src.estimators import FrameProcessor, MultiStreamProcessor, ScreenPointEstimator
+from src.processing import ProcessingWorker
+from src.serving import ResultServer, encode_result
+from src.video_capture import make_video_capture
+
+
+@hydra.main(config_path="conf", config_name="serve")
+def main(cfg: DictConfig) -> None:
+    log.basicConfig(level=log.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    feature_schema = cfg.data_collector.feature_schema
+    data_collector = DataCollector(read_feature_schema(feature_schema) if feature_schema else None)
+
+    estimator = None
+    if cfg.screen_point_model:
+        estimator = ScreenPointEstimator.load(cfg.screen_point_model)
+        data_collector.set_feature_names(estimator.feature_names)
+    else:
+        log.warning('No screen_point_model given, results are sent without a screen point')
+
+    if cfg.serve.streams:
+        # one set of compiled models shared by a worker thread per camera
+        processor = MultiStreamProcessor(cfg, len(cfg.serve.streams))
+        sources = [(processor.stream(i), OmegaConf.merge(cfg.video_capture, stream))
+                   for i, stream in enumerate(cfg.serve.streams)]
+    else:
+        sources = [(FrameProcessor(cfg), cfg.video_capture)]
+    workers = []
+    for i, (frame_processor, video_capture_config) in enumerate(sources):
+        video_capture = make_video_capture(video_capture_config, frame_processor.pipeline_depth)
+        worker = ProcessingWorker(video_capture, frame_processor, data_collector,
+                                  preview_size=None, queue_size=cfg.processing.queue_size, stream=i)
+        if estimator is not None:
+            worker.predictor = ProcessingWorker.Predictor(estimator, data_collector.features)
+        worker.predicting = estimator is not None
+        workers.append(worker)
+
+    server = ResultServer(cfg.serve.address, cfg.serve.subscriber_queue_size)
+    log.info('Serving results on {}'.format(cfg.serve.address))
+    last_log = time.monotonic()
+    try:
+        while True:
+            timeout = 0.1 / len(workers)
+            for worker in workers:
+                for result in worker.results(timeout=timeout):
+                    server.publish(encode_result(result))
+            if time.monotonic() - last_log >= cfg.serve.log_interval:
+                last_log = time.monotonic()
+                log.info('{} FPS, {} subscribers'.format(
+                    ", ".join("{:.1f}".format(worker.fps.fps) for worker in workers), server.num_subscribers))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for worker in workers:
+            worker.close()
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,29 +1,36 @@
-from threading import Thread
-
+import logging as log
+import time
 import tkinter as tk
 import tkinter.ttk as ttk
+from collections import deque
 
 from ttkthemes import ThemedTk
-from tkinter.filedialog import askopenfilename, asksaveasfilename
+from tkinter.filedialog import askopenfilename, askopenfilenames, asksaveasfilename
 
 import numpy as np
+from hydra.utils import instantiate
 from omegaconf import DictConfig
-from sklearn.ensemble import GradientBoostingRegressor
 from PIL import Image
 from PIL.ImageTk import PhotoImage
 
-from .data_collector import DataCollector
-from .estimators import FrameProcessor, ScreenPointEstimatorSklearn, ScreenPointEstimatorCatboost
+from .data_collector import DataCollector, read_feature_schema
+from .estimators import FrameProcessor, ModelArtifact, ScreenPointEstimator
 from .heatmap_renderer import HeatmapRenderer
-from .video_capture import VideoCapture
-from .utils import draw_detections, resize_image, get_distance
+from .processing import ProcessingWorker
+from .training import BackgroundTrainer
+from .video_capture import make_video_capture
+from .utils import FpsCounter
 
 
 class App(ThemedTk):
     _TOTAL_EXAMPLES_TMP = "Total examples: {:4d}"
     _TRAIN_MSE_TMP = "Train RMSE: {:5.3f}"
     _VAL_MSE_TMP = "Val RMSE: {:5.3f}"
+    _FIT_REPORT_TMP = "Last fit: {}, {:.1f} s"
+    _PROGRESS_TMP = "Training: it. {}, train {:5.3f}, val {:5.3f}"
+    _FPS_TMP = "Inference: {:4.1f} FPS, UI: {:4.1f} FPS"
     _SECONDARY_BG = "#99FFFF"
+    _OVERLAY_SECONDS = 1.0
     _BG = "images/bg.jpg"
 
     def __init__(self, args: DictConfig, title, update_delay=15):
@@ -39,25 +46,36 @@ class App(ThemedTk):
         self._is_drawing_heatmap = False
         self._is_collecting = False
         self._is_pressed = False
-        self._canvas_contents = {}
-
-        self.data_collector = DataCollector()
+        self._canvas_images = {}  # {canvas: (PhotoImage, image item)}
+        self._overlays = deque()  # (canvas, item, expiration time) of transient texts, oldest first
+        self._drawn_heatmap_version = None
+        self._latest_result = None
+        self._ui_fps = FpsCounter()
+
+        feature_schema = args.data_collector.feature_schema
+        self.data_collector = DataCollector(read_feature_schema(feature_schema) if feature_schema else None)
+        self._trained_samples = 0  # rows of the collected data the screen point estimator was fitted on
+        self._training_samples = 0
+        self._blocked_buttons = None
+        self.trainer = BackgroundTrainer()
+        self._dataset_stream = args.data_collector
         self.frame_processor = FrameProcessor(args)
-        self.video_capture = VideoCapture()
-        self.screen_point_estimator = ScreenPointEstimatorCatboost(
-            use_best_model=True,
-            early_stopping_rounds=10,
-            iterations=2000,
-            random_strength=1,
-        )
-        # l2_leaf_reg
-        # random_strength
+        self.video_capture = make_video_capture(args.video_capture, self.frame_processor.pipeline_depth)
+        # capture and inference run on the worker, the Tk loop only renders its latest result
+        self.worker = ProcessingWorker(self.video_capture, self.frame_processor, self.data_collector,
+                                       preview_size=(self.width // 5, self.height // 4),
+                                       queue_size=args.processing.queue_size)
+        self.screen_point_estimator = instantiate(args.screen_point_estimator)
         self.heatmap_renderer = HeatmapRenderer(size=(self.width, self.height), bg=np.asarray(Image.open(self._BG)))
 
         self._style_init()
         self._build_camera_frame(self)
         self._build_control_menu(self)
 
+        if args.screen_point_model:
+            self._load_model(args.screen_point_model)
+            self.start_drawing_heatmap()
+
         self.delay = update_delay
         self.update()
 
@@ -88,6 +106,8 @@ class App(ThemedTk):
                                            text=self._TRAIN_MSE_TMP.format(self.screen_point_estimator.train_mse))
         self.info["val_mse"] = ttk.Label(info_frame,
                                          text=self._VAL_MSE_TMP.format(self.screen_point_estimator.val_mse))
+        self.info["fit_report"] = ttk.Label(info_frame, text="")
+        self.info["fps"] = ttk.Label(info_frame, text=self._FPS_TMP.format(0, 0))
         for widget in info_frame.winfo_children():
             widget["background"] = self._SECONDARY_BG
             widget.pack(side=tk.LEFT, pady=pad, padx=pad)
@@ -124,6 +144,13 @@ class App(ThemedTk):
                                                     text='Start training',
                                                     command=self.start_training,
                                                     state="disabled")
+        self.buttons["save_model"] = ttk.Button(buttons_frame,
+                                                text='Save model',
+                                                command=self.save_model,
+                                                state="disabled")
+        self.buttons["load_model"] = ttk.Button(buttons_frame,
+                                                text='Load model',
+                                                command=self.load_model)
 
         n, m = np.meshgrid(range(len(self.buttons) // 2), range(2))
         for widget, i, j in zip(buttons_frame.winfo_children(), n.ravel(), m.ravel()):
@@ -132,6 +159,16 @@ class App(ThemedTk):
 
         frame.pack(side=side, anchor=anchor)
 
+    @property
+    def screen_point_estimator(self):
+        return self.worker.estimator
+
+    @screen_point_estimator.setter
+    def screen_point_estimator(self, estimator):
+        # the estimator and its features go in a single reference assignment, the worker predicts with both from its
+        # next frame on
+        self.worker.predictor = ProcessingWorker.Predictor(estimator, self.data_collector.features)
+
     def _disable_button(self, button: str | list[str]):
         if isinstance(button, str):
             self.buttons[button]["state"] = "disabled"
@@ -146,23 +183,20 @@ class App(ThemedTk):
             for b in button:
                 self.buttons[b]["state"] = "normal"
 
-    @staticmethod
-    def block_all(text):
-        def block_all_decorator(func):
-            def _wrapper(self, *args, **kwargs):
-                buttons_copy = {}
-                for button in self.buttons:
-                    buttons_copy[button] = {}
-                    buttons_copy[button]["text"] = self.buttons[button]["text"]
-                    buttons_copy[button]["state"] = self.buttons[button]["state"]
-                    self.buttons[button]["text"] = text
-                    self.buttons[button]["state"] = "disabled"
-                func(self, *args, **kwargs)
-                for button in self.buttons:
-                    self.buttons[button]["text"] = buttons_copy[button]["text"]
-                    self.buttons[button]["state"] = buttons_copy[button]["state"]
-            return _wrapper
-        return block_all_decorator
+    def _block_all(self, text):
+        buttons_copy = {}
+        for button in self.buttons:
+            buttons_copy[button] = {}
+            buttons_copy[button]["text"] = self.buttons[button]["text"]
+            buttons_copy[button]["state"] = self.buttons[button]["state"]
+            self.buttons[button]["text"] = text
+            self.buttons[button]["state"] = "disabled"
+        return buttons_copy
+
+    def _unblock_all(self, buttons_copy):
+        for button in self.buttons:
+            self.buttons[button]["text"] = buttons_copy[button]["text"]
+            self.buttons[button]["state"] = buttons_copy[button]["state"]
 
     def reset(self):
         if self._is_collecting:
@@ -172,6 +206,7 @@ class App(ThemedTk):
         self._activate_button(["load_dataset", "collect_data"])
         self._disable_button(["start_training", "clear_heatmap", "save_dataset", "stop_drawing_heatmap", "draw_heatmap"])
         self.data_collector.reset()
+        self._trained_samples = 0
         self.heatmap_renderer.clear()
         self.info["total_examples"]["text"] = self._TOTAL_EXAMPLES_TMP.format(self.data_collector.num_collected)
         self.info["train_mse"]["text"] = self._TRAIN_MSE_TMP.format(0)
@@ -180,34 +215,66 @@ class App(ThemedTk):
     def load_dataset(self):
         self.stop_collecting()
         self._activate_button("start_training")
-        filename = askopenfilename(
-            title="Select a file...",
-            filetypes=(("Comma separated value file", "*.csv"),)
+        filenames = askopenfilenames(
+            title="Select files...",
+            filetypes=(("Comma separated value file", "*.csv"), ("NumPy dataset", "*.npy"))
         )
-        if filename:
-            self.data_collector.load(filename)
+        if filenames:
+            self.data_collector.reset()
+            self._trained_samples = 0
+            self.data_collector.ingest(filenames)
             self.info["total_examples"]["text"] = self._TOTAL_EXAMPLES_TMP.format(self.data_collector.num_collected)
 
     def save_dataset(self):
         filename = asksaveasfilename(
             title="Save file as...",
-            filetypes=(("Comma separated value file", "*.csv"),),
+            filetypes=(("Comma separated value file", "*.csv"), ("NumPy dataset", "*.npy")),
             defaultextension=".csv"
         )
         if filename:
             self.data_collector.save(filename)
 
+    def save_model(self):
+        filename = asksaveasfilename(
+            title="Save model as...",
+            filetypes=(("Screen point model", "*" + ModelArtifact.SUFFIX),),
+            defaultextension=ModelArtifact.SUFFIX
+        )
+        if filename:
+            self.screen_point_estimator.save(filename)
+
+    def load_model(self):
+        filename = askopenfilename(
+            title="Select model...",
+            filetypes=(("Screen point model", "*" + ModelArtifact.SUFFIX),)
+        )
+        if filename:
+            self._load_model(filename)
+
+    def _load_model(self, path):
+        estimator = ScreenPointEstimator.load(path)
+        if estimator.feature_names != self.data_collector.features.feature_names:
+            # the collected rows get the features of the model
+            self.data_collector.set_feature_names(estimator.feature_names)
+        self.screen_point_estimator = estimator
+        # the loaded model was fitted on data that is not collected here, retraining starts from scratch
+        self._trained_samples = 0
+        self._activate_button(["draw_heatmap", "save_model"])
+        self._update_fit_info()
+
     def start_drawing_heatmap(self):
         if self._is_collecting:
             self.stop_collecting()
         self._activate_button(["clear_heatmap", "stop_drawing_heatmap"])
         self._disable_button("draw_heatmap")
         self._is_drawing_heatmap = True
+        self.worker.predicting = True
 
     def stop_drawing_heatmap(self):
         self._activate_button("draw_heatmap")
         self._disable_button("stop_drawing_heatmap")
         self._is_drawing_heatmap = False
+        self.worker.predicting = False
 
     def clear_heatmap(self):
         self.heatmap_renderer.clear()
@@ -219,20 +286,55 @@ class App(ThemedTk):
         self._disable_button("collect_data")
         self._activate_button(["start_training", "save_dataset"])
         self._is_collecting = True
+        if self._dataset_stream.stream_path:
+            self.data_collector.stream_to(self._dataset_stream.stream_path, self._dataset_stream.stream_chunk_size)
 
     def stop_collecting(self):
         self._activate_button("collect_data")
         self._is_collecting = False
         self._is_pressed = False
+        self.data_collector.close_stream()
 
     def start_training(self):
         self._disable_button("start_training")
-        self._activate_button("draw_heatmap")
-        Thread(target=self._start_training).start()
-
-    @block_all("Training...")
-    def _start_training(self):
-        self.screen_point_estimator.fit(self.data_collector.data, self.data_collector.target_columns)
+        # draw_heatmap is enabled once the fit is done, a failed fit restores the buttons as they were
+        self._blocked_buttons = self._block_all("Training...")
+
+        # the live estimator keeps predicting until the fitted copy comes back from the training process
+        data = self.data_collector.data
+        self._training_samples = len(data)
+        num_new = self._training_samples - self._trained_samples if self._trained_samples else None
+        self.trainer.start(self.screen_point_estimator, data, self.data_collector.target_columns, num_new)
+
+    def _poll_training(self):
+        for message in self.trainer.poll():
+            if message[0] == "progress":
+                _, iteration, learn, validation = message
+                self.info["fit_report"]["text"] = self._PROGRESS_TMP.format(
+                    iteration, learn or 0, validation or 0)
+            elif message[0] == "done":
+                self.screen_point_estimator = message[1]
+                self._trained_samples = self._training_samples
+                self._finish_training()
+            else:
+                self.info["fit_report"]["text"] = "Training failed: {}".format(message[1])
+                self._unblock_all(self._blocked_buttons)
+
+    def _finish_training(self):
+        self._unblock_all(self._blocked_buttons)
+        self._activate_button(["draw_heatmap", "save_model"])
+        self._update_fit_info()
+
+    def _update_fit_info(self):
+        if self.screen_point_estimator.fit_report is not None:
+            report = self.screen_point_estimator.fit_report
+            # reports of older models have no samples, estimators without iterations report None
+            details = [report["mode"]]
+            if report.get("samples") is not None:
+                details.append("{} samples".format(report["samples"]))
+            if report.get("iterations") is not None:
+                details.append("{} it.".format(report["iterations"]))
+            self.info["fit_report"]["text"] = self._FIT_REPORT_TMP.format(", ".join(details), report["seconds"])
         self.info["train_mse"]["text"] = self._TRAIN_MSE_TMP.format(self.screen_point_estimator.train_mse)
         self.info["val_mse"]["text"] = self._VAL_MSE_TMP.format(self.screen_point_estimator.val_mse)
 
@@ -261,55 +363,72 @@ class App(ThemedTk):
         self.info["total_examples"]["text"] = self._TOTAL_EXAMPLES_TMP.format(self.data_collector.num_collected)
 
     def _draw_in_canvas(self, canvas, array):
-        self._canvas_contents[canvas] = PhotoImage(image=Image.fromarray(array))
-        canvas.create_image(0, 0, image=self._canvas_contents[canvas], anchor=tk.NW)
+        # a canvas keeps a single image item, new frames are pasted into its PhotoImage
+        image = Image.fromarray(array)
+        if canvas in self._canvas_images:
+            photo, item = self._canvas_images[canvas]
+            if (photo.width(), photo.height()) == image.size:
+                photo.paste(image)
+                return
+            photo = PhotoImage(image=image)
+            canvas.itemconfigure(item, image=photo)
+        else:
+            photo = PhotoImage(image=image)
+            item = canvas.create_image(0, 0, image=photo, anchor=tk.NW)
+            canvas.tag_lower(item)
+        self._canvas_images[canvas] = (photo, item)
+
+    def _add_overlay(self, canvas, x, y, text):
+        item = canvas.create_text(x, y, anchor=tk.NW, text=text, fill="#004D40", font="Georgia, 16")
+        self._overlays.append((canvas, item, time.monotonic() + self._OVERLAY_SECONDS))
+
+    def _expire_overlays(self):
+        now = time.monotonic()
+        while self._overlays and self._overlays[0][2] <= now:
+            canvas, item, _ = self._overlays.popleft()
+            canvas.delete(item)
 
     def update(self):
-        # Get a frame from the video source
-        color_frame, depth_frame = self.video_capture.get_frame()
-        if color_frame is None:
-            self.after(self.delay, self.update)
-            return
-
-        # Draw face and detections
-        rois, landmarks, gazes, head_poses = self.frame_processor.process(color_frame)
-        draw_detections(color_frame, (rois, landmarks, gazes))
-        processed_face_frame = resize_image(color_frame, (self.width // 5, self.height // 4))
-        self._draw_in_canvas(self.cam_canvas, processed_face_frame)
-
-        # Find detections
-        if not rois:
-            self._draw_in_canvas(self.bg, self.heatmap_renderer.heatmap)
-            self.after(self.delay, self.update)
-            return
-        roi, eyes, gaze, head_pose = rois[0], landmarks[0], gazes[0], head_poses[0]
-        x, y = self.get_mouse_position()
-        dist = get_distance(depth_frame, rois[0].position, rois[0].size)
-
-        # Draw heatmap
-        if self._is_drawing_heatmap:
-            X = self.data_collector.make_row(face_position=roi.position,
-                                             face_size=roi.size,
-                                             distance_to_face=dist,
-                                             left_eye_position=eyes.position[0],
-                                             right_eye_position=eyes.position[1],
-                                             eyes_size=eyes.size,
-                                             head_pose=head_pose,
-                                             gaze_direction=gaze, feature_augmentation=True)
-            y_pred = self.screen_point_estimator.predict([X])[0]
-            self.heatmap_renderer.step(y_pred)
-        self._draw_in_canvas(self.bg, self.heatmap_renderer.heatmap)
+        # the loop reschedules itself whatever happens, a failed tick must not freeze the preview and the heatmap
+        try:
+            self._update()
+        except Exception:
+            log.exception('UI update failed')
+        self.after(self.delay, self.update)
+
+    def _update(self):
+        self._poll_training()
+        self._ui_fps.tick()
+
+        results = self.worker.results()
+        for result in results:
+            if self._is_drawing_heatmap and result.screen_point is not None:
+                self.heatmap_renderer.step(result.screen_point)
+        if results:
+            self._latest_result = results[-1]
+            self._draw_in_canvas(self.cam_canvas, self._latest_result.preview)
+        heatmap = self.heatmap_renderer.heatmap
+        if self.heatmap_renderer.version != self._drawn_heatmap_version:
+            self._draw_in_canvas(self.bg, heatmap)
+            self._drawn_heatmap_version = self.heatmap_renderer.version
+        self._expire_overlays()
+        self.info["fps"]["text"] = self._FPS_TMP.format(self.worker.fps.fps, self._ui_fps.fps)
 
         # Collect data
-        if self._is_collecting and self._is_pressed and rois:
-            self.collect_data(roi=roi,
-                              eyes=eyes,
-                              head_pose=head_pose,
-                              gaze=gaze,
-                              dist=dist,
+        result = self._latest_result
+        if self._is_collecting and self._is_pressed and result is not None and result.rois:
+            x, y = self.get_mouse_position()
+            self.collect_data(roi=result.rois[0],
+                              eyes=result.landmarks[0],
+                              head_pose=result.head_poses[0],
+                              gaze=result.gazes[0],
+                              dist=result.distance,
                               screen_point=(x, y))
-            self.bg.create_text(x - 30, y - 25, anchor=tk.NW, text="CLICK!", fill="#004D40", font="Georgia, 16")
-        self.after(self.delay, self.update)
+            self._add_overlay(self.bg, x - 30, y - 25, "CLICK!")
+
+    def destroy(self):
+        self.worker.close()
+        super().destroy()
 
 
 if __name__ == "__main__":
@@ -1 +1,2 @@
-from .data_collector import DataCollector
\ No newline at end of file
+from .data_collector import DataCollector
+from .feature_transformer import FeatureTransformer, read_feature_schema, write_feature_schema
@@ -1,6 +1,13 @@
+from concurrent.futures import ThreadPoolExecutor
+from glob import glob
+import os
+
 import pandas as pd
 import numpy as np
 
+from .dataset_io import DatasetWriter, read_dataset, write_dataset
+from .feature_transformer import FeatureTransformer
+
 
 class DataCollector:
     _COLUMNS = [
@@ -25,54 +32,67 @@ class DataCollector:
         "screen_point_y",
     ]
 
-    def __init__(self):
-        self._data = []
+    # every generated feature, the default feature schema
+    FEATURES = FeatureTransformer(_COLUMNS[:-2])
+    _INITIAL_CAPACITY = 256
+
+    def __init__(self, feature_names=None):
+        self._set_features(feature_names)
+        self._stream = None
+        self._stream_chunk_size = None
+        self._streamed = 0
+        self.reset()
+
+    def _set_features(self, feature_names):
+        self.features = self.FEATURES if feature_names is None else FeatureTransformer(self._COLUMNS[:-2], feature_names)
+        # rows are stored as [features | targets | raw columns missing from the features], growing by doubling
+        features = self.features.feature_names
+        self._columns = features + self.target_columns + [c for c in self.features.raw_columns if c not in features]
+        self._raw_index = [self._columns.index(c) for c in self._COLUMNS]
+
+    def set_feature_names(self, feature_names):
+        """Switches to another feature schema, features of the collected rows are generated again."""
+        data = self._raw_data().copy()
+        self._set_features(feature_names)
+        self._buffer = np.empty((max(len(data), self._INITIAL_CAPACITY), len(self._columns)), dtype=np.float64)
+        self._size = 0
+        self._append(data)
 
     @property
     def num_collected(self):
-        return len(self._data)
+        return self._size
 
     @property
     def data(self):
-        df = pd.DataFrame(self._data, columns=self._COLUMNS)
-        X, y = df.drop(columns=self._COLUMNS[-2:]), df[self._COLUMNS[-2:]]
-        X = self.generate_features(X)
-        return pd.concat([X, y], axis=1)
+        width = self.features.num_features + len(self.target_columns)
+        return pd.DataFrame(self._buffer[:self._size, :width], columns=self._columns[:width], copy=False)
 
     @property
     def target_columns(self):
         return self._COLUMNS[-2:]
 
-    @staticmethod
-    def make_row(face_position, face_size, distance_to_face, left_eye_position, right_eye_position, eyes_size,
-                 head_pose, gaze_direction, screen_point=None, feature_augmentation=False):
+    def make_row(self, face_position, face_size, distance_to_face, left_eye_position, right_eye_position, eyes_size,
+                 head_pose, gaze_direction, screen_point=None, feature_augmentation=False, features=None, out=None):
+        """features is the FeatureTransformer of the augmentation (the collector's own by default), out an optional
+        buffer of its num_features values."""
         row = [*face_position, *face_size, distance_to_face,
                *left_eye_position, *right_eye_position, *eyes_size, *head_pose, *gaze_direction]
         if feature_augmentation:
-            row = DataCollector.generate_features(row)
+            features = self.features if features is None else features
+            out = out.reshape(1, -1) if out is not None else None
+            row = features.transform([row], out=out)[0]
+            if screen_point is not None:
+                row = np.concatenate([row, screen_point])
+            return row
         if screen_point is not None:
             row.extend(screen_point)
         return row
 
-    @staticmethod
-    def generate_features(df: pd.DataFrame | list):
+    def generate_features(self, df: pd.DataFrame | list):
         if isinstance(df, pd.DataFrame):
-            for column in df.columns:
-                df[column + "_pow2"] = df[column].map(lambda x: x ** 2)
-                df[column + "_pow3"] = df[column].map(lambda x: x ** 3)
-                df[column + "_log"] = df[column].map(lambda x: np.log(max(1, x)))
-                df[column + "_inv"] = df[column].map(lambda x: 1 / (x + 1e-6))
-                df[column + "_sin"] = df[column].map(lambda x: np.sin(x))
-                df[column + "_cos"] = df[column].map(lambda x: np.cos(x))
-        else:
-            for x in df[:]:
-                df.append(x ** 2)
-                df.append(x ** 3)
-                df.append(np.log(max(1, x)))
-                df.append(1 / (x + 1e-6))
-                df.append(np.sin(x)),
-                df.append(np.cos(x))
-        return df
+            features = self.features.transform(df[self.features.raw_columns].values)
+            return pd.DataFrame(features, columns=self.features.feature_names, index=df.index)
+        return self.features.transform([df])[0].tolist()
 
     def add(self, face_position, face_size, distance_to_face,
             left_eye_position, right_eye_position, eyes_size,
@@ -88,14 +108,104 @@ class DataCollector:
             gaze_direction=gaze_direction,
             screen_point=screen_point
         )
-        self._data.append(new_row)
+        self._append([new_row])
+        if self._stream is not None and self._size - self._streamed >= self._stream_chunk_size:
+            self.flush()
+
+    def _reserve(self, size):
+        capacity = len(self._buffer)
+        if size <= capacity:
+            return
+        buffer = np.empty((max(size, 2 * capacity), len(self._columns)), dtype=np.float64)
+        buffer[:self._size] = self._buffer[:self._size]
+        self._buffer = buffer
+
+    def _append(self, rows):
+        rows = np.asarray(rows, dtype=np.float64).reshape(-1, len(self._COLUMNS))
+        self._reserve(self._size + len(rows))
+        new_rows = self._buffer[self._size:self._size + len(rows)]
+        # features are derived once, when the rows are appended
+        self.features.transform(rows[:, :-2], out=new_rows[:, :self.features.num_features])
+        new_rows[:, self._raw_index] = rows
+        self._size += len(rows)
+
+    def _raw_data(self, start=0):
+        return self._buffer[start:self._size, self._raw_index]
 
     def load(self, path):
-        df = pd.read_csv(path)
-        self._data = df.values.tolist()
+        data = read_dataset(path, self._COLUMNS)
+        self.reset()
+        self._append(data)
 
     def save(self, path):
-        pd.DataFrame(self._data, columns=self._COLUMNS).to_csv(path, index=False)
+        write_dataset(path, self._raw_data(), self._COLUMNS)
+
+    @classmethod
+    def _read_deduplicated(cls, path, near_duplicate_distance, near_duplicate_frames):
+        data = read_dataset(path, cls._COLUMNS)
+        valid = np.isfinite(data).all(axis=1)
+        rows_read, invalid_rows = len(data), len(data) - int(valid.sum())
+        data = data[valid]
+        keep = np.ones(len(data), dtype=bool)
+        # a click at (almost) the same screen point within a few frames of a previous one is a near-duplicate
+        screen_points = data[:, -2:]
+        for lag in range(1, near_duplicate_frames + 1):
+            distance = np.linalg.norm(screen_points[lag:] - screen_points[:-lag], axis=1)
+            keep[lag:] &= distance > near_duplicate_distance
+        return rows_read, invalid_rows, np.ascontiguousarray(data[keep])
+
+    def ingest(self, paths, workers=None, near_duplicate_distance=5, near_duplicate_frames=3):
+        """Appends many datasets (paths or glob patterns) read in parallel, dropping rows with non-finite values and
+        exact and near-duplicate rows."""
+        if isinstance(paths, (str, os.PathLike)):
+            paths = [paths]
+        files = []
+        for path in map(str, paths):
+            files.extend(sorted(glob(path)) if any(c in path for c in "*?[") else [path])
+
+        stats = {"files": len(files), "rows_read": 0, "invalid_rows": 0, "near_duplicates": 0, "exact_duplicates": 0,
+                 "rows_added": 0}
+        # hashes of the rows rather than their bytes, so the set is not another copy of the data
+        seen = {hash(row.tobytes()) for row in self._raw_data()}
+        with ThreadPoolExecutor(max_workers=workers or min(len(files), os.cpu_count()) or 1) as executor:
+            results = executor.map(
+                lambda path: self._read_deduplicated(path, near_duplicate_distance, near_duplicate_frames), files)
+            for rows_read, invalid_rows, data in results:
+                keep = np.ones(len(data), dtype=bool)
+                for i, row in enumerate(data):
+                    key = hash(row.tobytes())
+                    keep[i] = key not in seen
+                    seen.add(key)
+                self._append(data[keep])
+
+                stats["rows_read"] += rows_read
+                stats["invalid_rows"] += invalid_rows
+                stats["near_duplicates"] += rows_read - invalid_rows - len(data)
+                stats["exact_duplicates"] += len(data) - int(keep.sum())
+                stats["rows_added"] += int(keep.sum())
+        return stats
+
+    def stream_to(self, path, chunk_size=64):
+        """Appends rows collected from now on to a .npy dataset, chunk_size rows at a time."""
+        self.close_stream()
+        self._stream = DatasetWriter(path, self._COLUMNS)
+        self._stream_chunk_size = chunk_size
+        self._streamed = self._size
+
+    def flush(self):
+        if self._stream is None:
+            return
+        self._stream.append(self._raw_data(self._streamed))
+        self._streamed = self._size
+
+    def close_stream(self):
+        if self._stream is None:
+            return
+        self.flush()
+        self._stream.close()
+        self._stream = None
 
     def reset(self):
-        self._data = []
+        self._streamed = 0
+        self._buffer = np.empty((self._INITIAL_CAPACITY, len(self._columns)), dtype=np.float64)
+        self._size = 0
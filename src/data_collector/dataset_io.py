@@ -0,0 +1,104 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+
+NPY_SUFFIX = ".npy"
+CSV_SUFFIX = ".csv"
+
+
+def _dtype(columns):
+    # the column schema is stored in the .npy header as a structured dtype of float64 fields
+    return np.dtype([(column, "<f8") for column in columns])
+
+
+class DatasetWriter:
+    """Appends rows to a .npy file of a structured dtype, rewriting the row count in its header after each chunk."""
+    _MAGIC = b"\x93NUMPY\x01\x00"
+    _ALIGNMENT = 64
+    _SHAPE_SLACK = 24  # room for the digits of the row count
+
+    def __init__(self, path, columns, append=True):
+        self.path = path
+        self.columns = list(columns)
+        self.dtype = _dtype(self.columns)
+        if append and os.path.exists(path) and os.path.getsize(path) > 0:
+            self._file = open(path, "r+b")
+            self.rows, self._header_size = self._read_header()
+        else:
+            self._file = open(path, "w+b")
+            self.rows = 0
+            self._header_size = self._header_length(self._header(0)) + self._SHAPE_SLACK
+            self._header_size += -(len(self._MAGIC) + 2 + self._header_size) % self._ALIGNMENT
+            self._write_header()
+
+    def _header(self, rows):
+        return "{{'descr': {}, 'fortran_order': False, 'shape': ({},), }}".format(
+            repr(np.lib.format.dtype_to_descr(self.dtype)), rows)
+
+    @staticmethod
+    def _header_length(header):
+        return len(header) + 1  # trailing newline
+
+    def _read_header(self):
+        version = np.lib.format.read_magic(self._file)
+        if version != (1, 0):
+            raise ValueError("Unsupported .npy version {} of {}".format(version, self.path))
+        shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(self._file)
+        if dtype != self.dtype or fortran_order or len(shape) != 1:
+            raise ValueError("Dataset {} has a different schema".format(self.path))
+        return shape[0], self._file.tell() - len(self._MAGIC) - 2
+
+    def _write_header(self):
+        header = self._header(self.rows)
+        if self._header_length(header) > self._header_size:
+            raise ValueError("No room left in the header of {}".format(self.path))
+        header = header.ljust(self._header_size - 1) + "\n"
+        self._file.seek(0)
+        self._file.write(self._MAGIC + self._header_size.to_bytes(2, "little") + header.encode("latin1"))
+
+    def append(self, rows):
+        rows = np.ascontiguousarray(rows, dtype=np.float64).reshape(-1, len(self.columns))
+        if not len(rows):
+            return
+        self._file.seek(len(self._MAGIC) + 2 + self._header_size + self.rows * self.dtype.itemsize)
+        self._file.write(rows.tobytes())
+        self._file.flush()
+        # the header is updated after the rows, so an interrupted write never exposes a partial row
+        self.rows += len(rows)
+        self._write_header()
+        self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+    def __del__(self):
+        self.close()
+
+
+def read_dataset(path, columns):
+    """Returns a (n, len(columns)) float64 array, memory-mapped for .npy files."""
+    if str(path).endswith(NPY_SUFFIX):
+        data = np.load(path, mmap_mode="r")
+        if data.dtype.names is None or not set(columns) <= set(data.dtype.names):
+            raise ValueError("Dataset {} does not have the columns {}".format(path, columns))
+        if list(data.dtype.names) == list(columns) and data.dtype == _dtype(columns):
+            return data.view(np.float64).reshape(len(data), len(columns))
+        return np.stack([data[column] for column in columns], axis=1)
+
+    df = pd.read_csv(path)
+    missing = [column for column in columns if column not in df.columns]
+    if missing:
+        raise ValueError("Dataset {} does not have the columns {}".format(path, missing))
+    return df[columns].values
+
+
+def write_dataset(path, data, columns):
+    if str(path).endswith(NPY_SUFFIX):
+        writer = DatasetWriter(path, columns, append=False)
+        writer.append(data)
+        writer.close()
+    else:
+        pd.DataFrame(data, columns=columns).to_csv(path, index=False)
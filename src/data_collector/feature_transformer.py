@@ -0,0 +1,66 @@
+import json
+
+import numpy as np
+
+
+class FeatureTransformer:
+    # generated feature name is "<raw column>_<transform>"
+    TRANSFORMS = {
+        "pow2": lambda x: x ** 2,
+        "pow3": lambda x: x ** 3,
+        "log": lambda x: np.log(np.maximum(x, 1)),
+        "inv": lambda x: 1 / (x + 1e-6),
+        "sin": np.sin,
+        "cos": np.cos,
+    }
+
+    def __init__(self, raw_columns, feature_names=None):
+        self.raw_columns = list(raw_columns)
+        if feature_names is None:
+            feature_names = self.raw_columns + [
+                "{}_{}".format(column, transform) for column in self.raw_columns for transform in self.TRANSFORMS]
+        self.feature_names = list(feature_names)
+
+        # output columns grouped by transform: {transform: (raw column indices, output column indices)}
+        plan = {}
+        for i, name in enumerate(self.feature_names):
+            column, transform = self._parse(name)
+            raw, out = plan.setdefault(transform, ([], []))
+            raw.append(self.raw_columns.index(column))
+            out.append(i)
+        self._plan = {transform: (np.asarray(raw), np.asarray(out)) for transform, (raw, out) in plan.items()}
+
+    def _parse(self, name):
+        if name in self.raw_columns:
+            return name, None
+        column, _, transform = name.rpartition("_")
+        if column not in self.raw_columns or transform not in self.TRANSFORMS:
+            raise ValueError("Unknown feature {}".format(name))
+        return column, transform
+
+    @property
+    def num_features(self):
+        return len(self.feature_names)
+
+    def transform(self, X, out=None):
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim != 2 or X.shape[1] != len(self.raw_columns):
+            raise ValueError("Expected array of shape (n, {}), got {}".format(len(self.raw_columns), X.shape))
+        if out is None:
+            out = np.empty((X.shape[0], self.num_features), dtype=np.float64)
+
+        for transform, (raw, columns) in self._plan.items():
+            values = X[:, raw]
+            out[:, columns] = values if transform is None else self.TRANSFORMS[transform](values)
+        return out
+
+
+def write_feature_schema(path, feature_names, **info):
+    with open(path, "w") as f:
+        json.dump({"feature_names": list(feature_names), **info}, f, indent=2)
+
+
+def read_feature_schema(path):
+    """Feature names of a schema written by write_feature_schema (see select_features.py)."""
+    with open(path) as f:
+        return json.load(f)["feature_names"]
@@ -2,5 +2,8 @@ from .head_pose_estimator import HeadPoseEstimator
 from .face_detection_estimator import FaceDetector
 from .facial_landmarks_estimator import LandmarksDetector
 from .gaze_estimator import GazeEstimator
-from .frame_processor import FrameProcessor
-from .screen_point_estimator import ScreenPointEstimatorSklearn, ScreenPointEstimatorCatboost
+from .frame_processor import FrameProcessor, FrameStream
+from .multi_stream_processor import MultiStreamProcessor
+from .screen_point_estimator import (ScreenPointEstimator, ScreenPointEstimatorSklearn, ScreenPointEstimatorCatboost,
+                                     ScreenPointEstimatorRidge, ScreenPointEstimatorKNN, ScreenPointEstimatorGeometric)
+from .model_artifact import ModelArtifact
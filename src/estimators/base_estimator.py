@@ -1,67 +1,121 @@
 from abc import ABC, abstractmethod
+from threading import Condition, Lock
+from time import perf_counter
 import logging as log
 
-from openvino.runtime import AsyncInferQueue
+from openvino.runtime import AsyncInferQueue, PartialShape
 import numpy as np
 
 
 class BaseEstimator(ABC):
-    def __init__(self, core, model_path, model_type):
+    def __init__(self, core, model_path, model_type, precision=None):
         self.core = core
         self.model_type = model_type
+        self.model_path = model_path
+        self.precision = precision
         log.info('Reading {} model from {}'.format(model_type, model_path))
+        start = perf_counter()
         self.model = core.read_model(model_path)
+        self.timings = {"read": perf_counter() - start}
         self.output_shape = self.model.outputs[0].shape
         self.input_tensor_name = self.model.inputs[0].get_any_name()
         self.active_requests = 0
 
+        # requests are tagged (usually with a frame id), so several frames can be in flight at once
         self.outputs = {}
+        self.contexts = {}
+        self._pending = {}
+        self._submitted = {}
+        self._condition = Condition()
+        # several threads (one per stream) submit to the same queue, the lock keeps start_async calls apart
+        self._start_lock = Lock()
+
         self.output_tensors = None
         self.max_requests = None
         self.infer_queue = None
 
-    def deploy(self, device, max_requests=1):
+    def reshape_to_dynamic_batch(self):
+        # the batch dimension is left dynamic, so every face of a frame goes through a single request
+        shapes = {input.get_any_name(): PartialShape([-1, *list(input.shape)[1:]]) for input in self.model.inputs}
+        self.model.reshape(shapes)
+
+    def deploy(self, device, max_requests=1, cache=None, config=None):
+        """config holds OpenVINO properties of the compiled model, e.g. {"PERFORMANCE_HINT": "THROUGHPUT"}."""
         self.max_requests = max_requests
-        compiled_model = self.core.compile_model(self.model, device)
+        config = dict(config or {})
+        if cache is not None:
+            compiled_model, timings = cache.compile_model(self.model, self.model_path, self.precision, device, config)
+        else:
+            start = perf_counter()
+            compiled_model = self.core.compile_model(self.model, device, config)
+            timings = {"compile": perf_counter() - start}
+        self.timings.update(timings)
         self.output_tensors = compiled_model.outputs
         self.infer_queue = AsyncInferQueue(compiled_model, self.max_requests)
         self.infer_queue.set_callback(self.completion_callback)
-        log.info('The {} model is loaded to {}'.format(self.model_type, device))
+        log.info('The {} model is loaded to {} ({})'.format(
+            self.model_type, device, ", ".join("{} {:.1f} ms".format(k, v * 1e3) for k, v in self.timings.items())))
 
-    def completion_callback(self, infer_request, id):
-        self.outputs[id] = [infer_request.results[out] for out in self.output_tensors]
+    def completion_callback(self, infer_request, userdata):
+        tag, id = userdata
+        with self._condition:
+            self.outputs.setdefault(tag, {})[id] = [infer_request.results[out] for out in self.output_tensors]
+            self._pending[tag] -= 1
+            self.active_requests -= 1
+            self._condition.notify_all()
 
-    def enqueue(self, input):
-        if self.max_requests <= self.active_requests:
-            log.warning('Processing request rejected - too many requests')
-            return False
+    def enqueue(self, input, tag=0):
+        with self._condition:
+            if self.max_requests <= self.active_requests:
+                log.warning('Processing request rejected - too many requests')
+                return False
+            id = self._submitted.get(tag, 0)
+            self._submitted[tag] = id + 1
+            self._pending[tag] = self._pending.get(tag, 0) + 1
+            self.active_requests += 1
 
-        self.infer_queue.start_async(input, self.active_requests)
-        self.active_requests += 1
+        with self._start_lock:
+            self.infer_queue.start_async(input, (tag, id))
         return True
 
-    def wait(self):
-        if self.active_requests <= 0:
-            return
-        self.infer_queue.wait_all()
-        self.active_requests = 0
+    def wait(self, tag=0):
+        with self._condition:
+            self._condition.wait_for(lambda: self._pending.get(tag, 0) <= 0)
 
-    def get_outputs(self):
-        self.wait()
-        return [np.squeeze(v) for _, v in sorted(self.outputs.items())]
+    def _pop_outputs(self, tag):
+        self.wait(tag)
+        with self._condition:
+            outputs = self.outputs.pop(tag, {})
+            self._pending.pop(tag, None)
+            self._submitted.pop(tag, None)
+        return outputs
 
-    def clear(self):
-        self.outputs = {}
+    def get_outputs(self, tag=0):
+        outputs = self._pop_outputs(tag)
+        return [np.squeeze(v) for _, v in sorted(outputs.items())]
+
+    def get_batch_outputs(self, tag=0):
+        outputs = self._pop_outputs(tag)
+        if not outputs:
+            return None
+        if len(outputs) != 1:
+            raise RuntimeError("Expected a single batched request, got {}".format(len(outputs)))
+        return outputs[0]
+
+    def clear(self, tag=0):
+        with self._condition:
+            self.outputs.pop(tag, None)
+        self.contexts.pop(tag, None)
 
-    def infer(self, inputs):
-        self.clear()
-        self.start_async(*inputs)
-        return self.postprocess()
+    def infer(self, inputs, tag=0):
+        self.clear(tag)
+        self.start_async(*inputs, tag=tag)
+        return self.postprocess(tag)
 
     @abstractmethod
-    def postprocess(self):
+    def postprocess(self, tag=0):
         ...
 
     @abstractmethod
-    def start_async(self, *frame):
+    def start_async(self, *frame, tag=0):
         ...
@@ -4,8 +4,6 @@ from omegaconf import DictConfig
 from .base_estimator import BaseEstimator
 from .utils import resize_input
 
-from openvino.runtime import PartialShape
-
 
 class FaceDetector(BaseEstimator):
     class Result:
@@ -33,7 +31,7 @@ class FaceDetector(BaseEstimator):
             self.size[:] = np.clip(self.size, min, max)
 
     def __init__(self, core, args: DictConfig):
-        super(FaceDetector, self).__init__(core, args.path, 'Face Detection')
+        super(FaceDetector, self).__init__(core, args.path, 'Face Detection', args.precision)
 
         if len(self.model.inputs) != 1:
             raise RuntimeError("The model expects 1 input layer")
@@ -54,18 +52,19 @@ class FaceDetector(BaseEstimator):
         self.roi_scale_factor = args.roi_scale_factor
 
     def preprocess(self, frame):
-        self.input_size = frame.shape
         return resize_input(frame, self.input_shape, self.nchw_layout)
 
-    def start_async(self, frame):
+    def start_async(self, frame, tag=0):
         input = self.preprocess(frame)
-        self.enqueue(input)
+        self.contexts[tag] = frame.shape  # (h, w, c)
+        self.enqueue(input, tag)
 
-    def enqueue(self, input):
-        return super(FaceDetector, self).enqueue({self.input_tensor_name: input})
+    def enqueue(self, input, tag=0):
+        return super(FaceDetector, self).enqueue({self.input_tensor_name: input}, tag)
 
-    def postprocess(self):
-        outputs = self.get_outputs()[0]
+    def postprocess(self, tag=0):
+        input_size = self.contexts.pop(tag)
+        outputs = self.get_outputs(tag)[0]
         # outputs shape is [N_requests, 1, 1, N_max_faces, 7]
 
         results = []
@@ -74,8 +73,8 @@ class FaceDetector(BaseEstimator):
             if result.confidence < self.confidence_threshold:
                 break  # results are sorted by confidence decrease
 
-            result.resize_roi(self.input_size[1], self.input_size[0])
+            result.resize_roi(input_size[1], input_size[0])
             result.rescale_roi(self.roi_scale_factor)
-            result.clip(self.input_size[1], self.input_size[0])
+            result.clip(input_size[1], input_size[0])
             results.append(result)
         return results
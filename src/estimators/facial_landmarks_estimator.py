@@ -43,7 +43,7 @@ class LandmarksDetector(BaseEstimator):
             self.size[:] = np.clip(self.size, min, max)
 
     def __init__(self, core, args):
-        super(LandmarksDetector, self).__init__(core, args.path, 'Landmarks Detection')
+        super(LandmarksDetector, self).__init__(core, args.path, 'Landmarks Detection', args.precision)
         self.points_number = args.points_number
 
         if len(self.model.inputs) != 1:
@@ -57,33 +57,33 @@ class LandmarksDetector(BaseEstimator):
         if not self.points_number * 2 == self.output_shape[1]:
             raise RuntimeError("The model expects output shape {}, got {}".format(
                 [1, self.points_number * 2, 1, 1], self.output_shape))
+        self.reshape_to_dynamic_batch()
 
     def preprocess(self, frame, rois):
-        self.input_size = frame.shape  # (h, w, c)
         inputs = cut_rois(frame, rois)
         inputs = [resize_input(input, self.input_shape, self.nchw_layout) for input in inputs]
-        return inputs
+        return np.concatenate(inputs)
 
-    def enqueue(self, input):
-        return super(LandmarksDetector, self).enqueue({self.input_tensor_name: input})
+    def enqueue(self, input, tag=0):
+        return super(LandmarksDetector, self).enqueue({self.input_tensor_name: input}, tag)
 
-    def start_async(self, frame, rois):
-        inputs = self.preprocess(frame, rois)
-        self.rois = {}
-        for input, roi in zip(inputs, rois):
-            self.rois[self.active_requests] = roi  # (w, h)
-            self.enqueue(input)
+    def start_async(self, frame, rois, tag=0):
+        self.contexts[tag] = frame.shape, rois  # (h, w, c)
+        if rois:
+            self.enqueue(self.preprocess(frame, rois), tag)
 
-    def postprocess(self):
-        outputs = self.get_outputs()
+    def postprocess(self, tag=0):
+        input_size, rois = self.contexts.pop(tag)
+        outputs = self.get_batch_outputs(tag)
+        if outputs is None:
+            return []
 
         results = []
-        for i, output in enumerate(outputs):
-            roi = self.rois[i]
+        for roi, output in zip(rois, outputs[0]):
             output = output.reshape((-1, 2)).astype(np.float64)
             result = LandmarksDetector.Result(output, self.output_type)
             result.resize(*roi.size)
             result.shift(*roi.position)
-            result.clip(self.input_size[1], self.input_size[0])
+            result.clip(input_size[1], input_size[0])
             results.append(result)
         return results
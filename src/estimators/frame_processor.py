@@ -1,39 +1,78 @@
+from collections import deque
+from itertools import count
+
 from openvino.runtime import Core
 from omegaconf import DictConfig
 
 import logging as log
 
-from . import FaceDetector, LandmarksDetector, HeadPoseEstimator, GazeEstimator
+from .model_cache import ModelCache
+from .stage_graph import StageGraph
 
 
-class FrameProcessor:
-    QUEUE_SIZE = 1
+def deploy_graph(args: DictConfig, root_requests, requests, config=None):
+    log.info('OpenVINO Runtime')
+    core = Core()
+    cache = ModelCache(core, args.model_cache_dir) if args.model_cache_dir else None
+    graph = StageGraph(core, args, args.frame_processor)
+    graph.deploy(args.device, root_requests=root_requests, requests=requests, cache=cache, config=config)
+    return graph
 
-    def __init__(self, args: DictConfig):
-        log.info('OpenVINO Runtime')
-        core = Core()
 
-        self.face_detector = FaceDetector(core, args.face_detection_estimator)
-        self.landmarks_detector = LandmarksDetector(core, args.facial_landmarks_estimator)
-        self.head_pose_estimator = HeadPoseEstimator(core, args.head_pose_estimator)
-        self.gaze_estimator = GazeEstimator(core, args.gaze_estimator)
+class FrameStream:
+    """Frames of one stream in flight through a stage graph, retrieved in the order they were submitted.
+
+    Requests are tagged with the frame id, or with (stream, frame id) when the graph is shared by several streams.
+    """
+
+    def __init__(self, graph: StageGraph, pipeline_depth=1, max_faces=None, stream=None):
+        # number of frames in flight: detection of the next frames runs while the oldest one finishes
+        self.pipeline_depth = pipeline_depth
+        if self.pipeline_depth < 1:
+            raise ValueError("Expected pipeline depth of at least 1")
+        # faces of a frame are batched into a single request per stage, None keeps all of them
+        self.max_faces = max_faces
+        self.graph = graph
+        self.stream = stream
+
+        self._frame_ids = count()
+        self._in_flight = deque()
 
-        self.face_detector.deploy(device=args.device)
-        self.landmarks_detector.deploy(args.device, self.QUEUE_SIZE)
-        self.head_pose_estimator.deploy(args.device, self.QUEUE_SIZE)
-        self.gaze_estimator.deploy(args.device, self.QUEUE_SIZE)
+    def _tag(self, frame_id):
+        return frame_id if self.stream is None else (self.stream, frame_id)
+
+    @property
+    def estimators(self):
+        return {name: stage.estimator for name, stage in self.graph.stages.items()}
 
     def process(self, frame):
-        orig_image = frame.copy()
+        return self.graph.run(frame, self._tag(next(self._frame_ids)), max_results=self.max_faces)
+
+    def submit(self, frame, payload=None):
+        frame_id = next(self._frame_ids)
+        self.graph.start(frame, self._tag(frame_id))
+        self._in_flight.append((frame_id, frame, payload))
+        return frame_id
+
+    def retrieve(self):
+        frame_id, frame, payload = self._in_flight.popleft()
+        results = self.graph.run(frame, self._tag(frame_id), started=True, max_results=self.max_faces)
+        return frame_id, frame, payload, results
 
-        rois = self.face_detector.infer((frame,))
-        if self.QUEUE_SIZE < len(rois):
-            # log.warning('Too many faces for processing. Will be processed only {} of {}'
-            #             .format(self.QUEUE_SIZE, len(rois)))
-            rois = rois[:self.QUEUE_SIZE]
+    def process_pipelined(self, frame, payload=None):
+        """Returns (frame_id, frame, payload, results) of the oldest frame, or None while the pipeline fills."""
+        self.submit(frame, payload)
+        if len(self._in_flight) < self.pipeline_depth:
+            return None
+        return self.retrieve()
 
-        landmarks = self.landmarks_detector.infer((frame, rois))
-        head_pose = self.head_pose_estimator.infer((frame, rois))
-        gaze = self.gaze_estimator.infer((frame, landmarks, head_pose))
+    def flush(self):
+        while self._in_flight:
+            yield self.retrieve()
 
-        return [rois, landmarks, gaze, head_pose]
+
+class FrameProcessor(FrameStream):
+    def __init__(self, args: DictConfig):
+        pipeline_depth = args.frame_processor.pipeline_depth
+        graph = deploy_graph(args, root_requests=pipeline_depth, requests=1)
+        super(FrameProcessor, self).__init__(graph, pipeline_depth, args.frame_processor.max_faces)
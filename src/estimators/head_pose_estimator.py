@@ -1,10 +1,12 @@
+import numpy as np
+
 from .utils import cut_rois, resize_input
 from .base_estimator import BaseEstimator
 
 
 class HeadPoseEstimator(BaseEstimator):
     def __init__(self, core, args):
-        super(HeadPoseEstimator, self).__init__(core, args.path, 'Head pose estimator')
+        super(HeadPoseEstimator, self).__init__(core, args.path, 'Head pose estimator', args.precision)
         if len(self.model.inputs) != 1:
             raise RuntimeError("The model expects 1 input layer")
         if len(self.model.outputs) != 3:
@@ -12,21 +14,24 @@ class HeadPoseEstimator(BaseEstimator):
 
         self.input_shape = self.model.inputs[0].shape
         self.nchw_layout = self.input_shape[1] == 3
+        self.reshape_to_dynamic_batch()
 
     def preprocess(self, frame, rois):
         inputs = cut_rois(frame, rois)
         inputs = [resize_input(input, self.input_shape, self.nchw_layout) for input in inputs]
-        return inputs
-
-    def enqueue(self, input):
-        return super(HeadPoseEstimator, self).enqueue({self.input_tensor_name: input})
-
-
-    def start_async(self, frame, rois):
-        inputs = self.preprocess(frame, rois)
-        for input in inputs:
-            self.enqueue(input)
-
-    def postprocess(self):
-        results = self.get_outputs()
-        return results
+        return np.concatenate(inputs)
+
+    def enqueue(self, input, tag=0):
+        return super(HeadPoseEstimator, self).enqueue({self.input_tensor_name: input}, tag)
+
+    def start_async(self, frame, rois, tag=0):
+        if rois:
+            self.enqueue(self.preprocess(frame, rois), tag)
+
+    def postprocess(self, tag=0):
+        outputs = self.get_batch_outputs(tag)
+        if outputs is None:
+            return []
+        # (yaw, pitch, roll) outputs of shape [N, 1] -> one [yaw, pitch, roll] row per face
+        results = np.concatenate([np.reshape(output, (-1, 1)) for output in outputs], axis=1)
+        return list(results)
@@ -0,0 +1,82 @@
+import io
+import json
+import os
+import struct
+import zipfile
+
+import numpy as np
+
+
+class ModelArtifact:
+    """Versioned zip archive of a fitted screen point estimator.
+
+    Members are stored uncompressed, so .npy members are memory-mapped straight from the archive on read.
+    Writing goes to a temporary file that replaces path on close, a reader never sees a partial artifact.
+    """
+    VERSION = 1
+    SUFFIX = ".zip"
+    _LOCAL_HEADER = struct.Struct("<4s5H3L2H")
+
+    def __init__(self, path, mode="r"):
+        if mode not in ("r", "w"):
+            raise ValueError("Unsupported mode {}".format(mode))
+        self.path = str(path)
+        self.mode = mode
+        self._tmp_path = self.path + ".tmp" if mode == "w" else None
+        self._zip = zipfile.ZipFile(self._tmp_path or self.path, mode, compression=zipfile.ZIP_STORED)
+
+    def write_bytes(self, name, data):
+        self._zip.writestr(name, data)
+
+    def read_bytes(self, name):
+        return self._zip.read(name)
+
+    def write_json(self, name, obj):
+        self.write_bytes(name, json.dumps(obj, indent=2))
+
+    def read_json(self, name):
+        return json.loads(self.read_bytes(name))
+
+    def write_array(self, name, array):
+        buffer = io.BytesIO()
+        np.save(buffer, np.ascontiguousarray(array), allow_pickle=False)
+        self.write_bytes(name, buffer.getvalue())
+
+    def read_array(self, name, mmap=True):
+        info = self._zip.getinfo(name)
+        if not mmap or info.compress_type != zipfile.ZIP_STORED:
+            return np.load(io.BytesIO(self.read_bytes(name)), allow_pickle=False)
+
+        with open(self.path, "rb") as f:
+            f.seek(info.header_offset)
+            header = self._LOCAL_HEADER.unpack(f.read(self._LOCAL_HEADER.size))
+            name_length, extra_length = header[-2:]
+            f.seek(name_length + extra_length, os.SEEK_CUR)
+            version = np.lib.format.read_magic(f)
+            read_header = (np.lib.format.read_array_header_1_0 if version == (1, 0)
+                           else np.lib.format.read_array_header_2_0)
+            shape, fortran_order, dtype = read_header(f)
+            offset = f.tell()
+        if not np.prod(shape) or dtype.hasobject:
+            return np.load(io.BytesIO(self.read_bytes(name)), allow_pickle=False)
+        return np.memmap(self.path, dtype=dtype, mode="r", shape=shape, offset=offset,
+                         order="F" if fortran_order else "C")
+
+    def __contains__(self, name):
+        return name in self._zip.namelist()
+
+    def close(self, commit=True):
+        if self._zip.fp is None:
+            return
+        self._zip.close()
+        if self._tmp_path is not None:
+            if commit:
+                os.replace(self._tmp_path, self.path)
+            else:
+                os.remove(self._tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close(commit=exc_type is None)
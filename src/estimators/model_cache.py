@@ -0,0 +1,80 @@
+import hashlib
+import json
+import logging as log
+import os
+from pathlib import Path
+from time import perf_counter
+
+from openvino.runtime import get_version
+
+
+class ModelCache:
+    """Stores exported compiled models, so a warm start imports a blob instead of compiling the IR."""
+    SUFFIX = ".blob"
+
+    def __init__(self, core, cache_dir):
+        self.core = core
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def _file_signature(path):
+        stat = os.stat(path)
+        return [str(path), stat.st_size, stat.st_mtime_ns]
+
+    def _key(self, model, model_path, precision, device, config):
+        model_path = Path(model_path).resolve()
+        files = [self._file_signature(model_path)]
+        weights_path = model_path.with_suffix(".bin")
+        if weights_path.exists():
+            files.append(self._file_signature(weights_path))
+        description = {
+            "model": str(model_path),
+            "precision": precision,
+            "device": device,
+            "config": {key: str(value) for key, value in config.items()},
+            "openvino": get_version(),
+            "files": files,
+            "inputs": [str(input.partial_shape) for input in model.inputs],
+        }
+        return hashlib.sha1(json.dumps(description, sort_keys=True).encode()).hexdigest()
+
+    def _prefix(self, model_path, precision, device, config):
+        # IRs of every precision share the file stem, so the precision is part of the prefix too; blobs of other
+        # precisions or compiled with other properties are kept apart and not removed as stale versions of each other
+        properties = "".join(".{}-{}".format(key, value) for key, value in sorted(config.items()))
+        return "{}.{}.{}{}.".format(Path(model_path).stem, precision, device, properties)
+
+    def _remove_stale(self, prefix, keep):
+        for path in self.cache_dir.glob(prefix + "*" + self.SUFFIX):
+            # only a key may follow the prefix, blobs of the same model with other properties have longer prefixes
+            if path != keep and "." not in path.name[len(prefix):-len(self.SUFFIX)]:
+                log.info('Removing stale compiled model {}'.format(path))
+                path.unlink(missing_ok=True)
+
+    def compile_model(self, model, model_path, precision, device, config=None):
+        """Returns (compiled_model, timings) where timings hold "compile" or "cache_hit" time in seconds."""
+        config = dict(config or {})
+        prefix = self._prefix(model_path, precision, device, config)
+        blob_path = self.cache_dir / (prefix + self._key(model, model_path, precision, device, config) + self.SUFFIX)
+        self._remove_stale(prefix, keep=blob_path)
+
+        if blob_path.exists():
+            start = perf_counter()
+            try:
+                compiled_model = self.core.import_model(blob_path.read_bytes(), device, config)
+                return compiled_model, {"cache_hit": perf_counter() - start}
+            except RuntimeError as e:
+                log.warning('Unable to import cached model {}: {}'.format(blob_path, e))
+                blob_path.unlink(missing_ok=True)
+
+        start = perf_counter()
+        compiled_model = self.core.compile_model(model, device, config)
+        timings = {"compile": perf_counter() - start}
+        try:
+            tmp_path = blob_path.with_suffix(".tmp")
+            tmp_path.write_bytes(compiled_model.export_model())
+            tmp_path.replace(blob_path)
+        except RuntimeError as e:
+            log.warning('Unable to cache compiled model {}: {}'.format(model_path, e))
+        return compiled_model, timings
@@ -0,0 +1,34 @@
+from omegaconf import DictConfig
+
+from .frame_processor import FrameStream, deploy_graph
+
+
+class MultiStreamProcessor:
+    """Serves several camera streams with a single set of compiled models.
+
+    The models are compiled with the OpenVINO performance hint of args.multi_stream (THROUGHPUT runs many requests
+    in parallel on the device) and every estimator gets enough requests for all the streams. stream(i) is a
+    FrameStream of its own, with requests tagged (i, frame id); each stream is meant to be driven by one thread, which
+    gets its frames back in order.
+    """
+
+    def __init__(self, args: DictConfig, num_streams):
+        if num_streams < 1:
+            raise ValueError("Expected at least 1 stream")
+        self.num_streams = num_streams
+        pipeline_depth = args.frame_processor.pipeline_depth
+        config = {"PERFORMANCE_HINT": args.multi_stream.performance_hint}
+        if args.multi_stream.inference_streams:
+            config["NUM_STREAMS"] = str(args.multi_stream.inference_streams)
+
+        self.graph = deploy_graph(args, root_requests=pipeline_depth * num_streams, requests=num_streams,
+                                  config=config)
+        self.streams = [FrameStream(self.graph, pipeline_depth, args.frame_processor.max_faces, stream=i)
+                        for i in range(num_streams)]
+
+    @property
+    def estimators(self):
+        return {name: stage.estimator for name, stage in self.graph.stages.items()}
+
+    def stream(self, index):
+        return self.streams[index]
@@ -0,0 +1,108 @@
+import json
+import os
+import tempfile
+import threading
+
+import numpy as np
+
+
+class ObliviousTreesPredictor:
+    """Evaluates a CatBoost oblivious-trees ensemble directly on float arrays, without building a Pool per call.
+
+    The work is laid out split-major with the rows innermost, so every step is a single numpy call over all trees;
+    the buffers of small batches are allocated once per thread and batch size.
+    """
+    _BUFFERED_MAX_ROWS = 16
+
+    def __init__(self, features, borders, leaf_values, scale=1.0, bias=0.0):
+        self.features = np.asarray(features, dtype=np.intp)  # (trees, depth)
+        self.borders = np.asarray(borders, dtype=np.float32)  # (trees, depth)
+        self.leaf_values = np.asarray(leaf_values, dtype=np.float64)  # (trees, 2 ** depth, dim)
+        self.scale = scale
+        self.bias = np.asarray(bias, dtype=np.float64)
+
+        trees, depth = self.features.shape
+        # row j * trees + t is split j of tree t
+        self._split_features = np.ascontiguousarray(self.features.T).ravel()
+        self._split_borders = np.ascontiguousarray(self.borders.T).ravel()
+        # (dim, trees * leaves), leaf l of tree t is column t * leaves + l
+        self._leaf_table = np.ascontiguousarray(self.leaf_values.reshape(trees << depth, -1).T)
+        self._leaf_offsets = (np.arange(trees, dtype=np.intp) << depth)[:, None]
+        self._local = threading.local()
+
+    def _buffers(self, rows):
+        trees, depth = self.features.shape
+        buffers = getattr(self._local, "buffers", None)
+        if buffers is None:
+            buffers = self._local.buffers = {}
+        if rows in buffers:
+            return buffers[rows]
+        result = {
+            "values": np.empty((depth * trees, rows), dtype=np.float32),
+            # borders repeated per row, a comparison broadcast over a short inner axis is several times slower
+            "borders": np.repeat(self._split_borders[:, None], rows, axis=1),
+            "bits": np.empty((depth * trees, rows), dtype=bool),
+            "leaf_index": np.empty((trees, rows), dtype=np.intp),
+            "shifted": np.empty((trees, rows), dtype=np.intp),
+            "leaf_values": np.empty((rows, trees)),
+        }
+        if rows <= self._BUFFERED_MAX_ROWS:
+            buffers[rows] = result
+        return result
+
+    @classmethod
+    def from_catboost(cls, regressor):
+        fd, path = tempfile.mkstemp(suffix=".json")
+        os.close(fd)
+        try:
+            regressor.save_model(path, format="json")
+            with open(path) as f:
+                model = json.load(f)
+        finally:
+            os.remove(path)
+
+        flat_index = {feature["feature_index"]: feature["flat_feature_index"]
+                      for feature in model["features_info"]["float_features"]}
+        trees = model["oblivious_trees"]
+        depth = max(len(tree["splits"]) for tree in trees)
+        dim = len(trees[0]["leaf_values"]) >> len(trees[0]["splits"])
+
+        # shallower trees are padded with splits that are never taken, which leaves their leaf index unchanged
+        features = np.zeros((len(trees), depth), dtype=np.intp)
+        borders = np.full((len(trees), depth), np.inf, dtype=np.float32)
+        leaf_values = np.zeros((len(trees), 1 << depth, dim))
+        for i, tree in enumerate(trees):
+            for j, split in enumerate(tree["splits"]):
+                if split["split_type"] != "FloatFeature":
+                    raise ValueError("Unsupported split type {}".format(split["split_type"]))
+                features[i, j] = flat_index[split["float_feature_index"]]
+                borders[i, j] = split["border"]
+            values = np.reshape(tree["leaf_values"], (-1, dim))
+            leaf_values[i, :len(values)] = values
+
+        scale, bias = model.get("scale_and_bias", [1.0, [0.0] * dim])
+        return cls(features, borders, leaf_values, scale, bias)
+
+    def predict(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[None, :]
+        trees, depth = self.features.shape
+        rows = len(X)
+        buffers = self._buffers(rows)
+
+        np.take(np.ascontiguousarray(X.T), self._split_features, axis=0, out=buffers["values"])
+        bits = np.greater(buffers["values"], buffers["borders"], out=buffers["bits"]).reshape(depth, trees, rows)
+        leaf_index, shifted = buffers["leaf_index"], buffers["shifted"]
+        leaf_index[...] = self._leaf_offsets
+        for j in range(depth):
+            np.left_shift(bits[j], j, out=shifted, casting="unsafe")
+            leaf_index += shifted
+
+        out = np.empty((rows, len(self._leaf_table)))
+        leaf_index = leaf_index.T
+        for k, table in enumerate(self._leaf_table):
+            np.take(table, leaf_index, out=buffers["leaf_values"]).sum(axis=1, out=out[:, k])
+        out *= self.scale
+        out += self.bias
+        return out
@@ -1,4 +1,11 @@
 from abc import ABC, abstractmethod
+from time import perf_counter
+import hashlib
+import importlib
+import logging as log
+import os
+import pickle
+import tempfile
 
 from catboost import CatBoostRegressor, Pool, FeaturesData
 
@@ -8,13 +15,57 @@ from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import StandardScaler
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_squared_error as mse
+from sklearn.neighbors import KDTree
+
+from .model_artifact import ModelArtifact
+from .oblivious_trees_predictor import ObliviousTreesPredictor
+
+
+def multi_rmse(y_true, y_pred):
+    """Root of the mean squared euclidean error, CatBoost's MultiRMSE."""
+    return float(np.sqrt(((np.asarray(y_true) - y_pred) ** 2).sum(axis=1).mean()))
 
 
 class ScreenPointEstimator(ABC):
+    # {"mode": ..., "samples": ..., "iterations": ..., "seconds": ...} of the last fit or update, samples are the
+    # rows the model was fitted on, iterations None for estimators without them
+    fit_report = None
+    # constructor parameters that keep a fit on a single core, used when many fits run in parallel
+    SINGLE_THREAD_PARAMS = {}
+    # fit_prepared picks the best iteration on val_data, so val_data must not be the rows the fit is scored on
+    EARLY_STOPPING = False
+    # schema of the data of the last fit and {"rows": ..., "sha1": ...} of it, saved along with the model
+    feature_names = None
+    target_columns = None
+    dataset_fingerprint = None
+
     @abstractmethod
     def fit(self, df, target_columns: list, train_size=0.7):
         ...
 
+    def _record_dataset(self, df, target_columns):
+        self.target_columns = list(target_columns)
+        self.feature_names = [column for column in df.columns if column not in self.target_columns]
+        data = np.ascontiguousarray(df.values)
+        self.dataset_fingerprint = {"rows": len(data), "sha1": hashlib.sha1(data).hexdigest()}
+
+    def prepare_data(self, X, y=None):
+        return np.asarray(X), None if y is None else np.asarray(y)
+
+    @abstractmethod
+    def fit_prepared(self, train_data, val_data):
+        """Fits on a split already converted by prepare_data, so it can be cached between fits."""
+        ...
+
+    def update(self, df, target_columns: list, num_new, train_size=0.7):
+        """Refits on df whose last num_new rows were added since the previous fit, estimators may do it incrementally."""
+        start = perf_counter()
+        self.fit_report = None
+        self.fit(df, target_columns, train_size)
+        # samples and iterations reported by fit are kept
+        self.fit_report = {"samples": None, "iterations": None, **(self.fit_report or {}), "mode": "full",
+                           "seconds": perf_counter() - start}
+
     @abstractmethod
     def predict(self, X):
         ...
@@ -29,13 +80,59 @@ class ScreenPointEstimator(ABC):
     def val_mse(self):
         ...
 
+    @abstractmethod
+    def _save_model(self, artifact: ModelArtifact):
+        ...
+
+    @classmethod
+    @abstractmethod
+    def _load_model(cls, artifact: ModelArtifact):
+        ...
+
+    def save(self, path):
+        if self.feature_names is None:
+            raise RuntimeError("The estimator is not fitted")
+        with ModelArtifact(path, "w") as artifact:
+            artifact.write_json("meta.json", {
+                "version": ModelArtifact.VERSION,
+                "class": "{}.{}".format(type(self).__module__, type(self).__qualname__),
+                "feature_names": self.feature_names,
+                "target_columns": self.target_columns,
+                "metrics": {"train_rmse": float(self.train_mse), "val_rmse": float(self.val_mse),
+                            "fit_report": self.fit_report},
+                "dataset": self.dataset_fingerprint,
+            })
+            self._save_model(artifact)
+
+    @staticmethod
+    def load(path):
+        with ModelArtifact(path) as artifact:
+            meta = artifact.read_json("meta.json")
+            if meta.get("version") != ModelArtifact.VERSION:
+                raise ValueError("Unsupported model artifact version {} of {}".format(meta.get("version"), path))
+            module, _, name = meta["class"].rpartition(".")
+            cls = getattr(importlib.import_module(module), name)
+            if not issubclass(cls, ScreenPointEstimator):
+                raise ValueError("{} is not a screen point estimator".format(meta["class"]))
+            estimator = cls._load_model(artifact)
+
+        estimator.feature_names = meta["feature_names"]
+        estimator.target_columns = meta["target_columns"]
+        estimator.dataset_fingerprint = meta["dataset"]
+        estimator.fit_report = meta["metrics"]["fit_report"]
+        estimator._train_mse = meta["metrics"]["train_rmse"]
+        estimator._val_mse = meta["metrics"]["val_rmse"]
+        return estimator
+
 
 class ScreenPointEstimatorSklearn(ScreenPointEstimator):
-    def __init__(self, base_estimator, seed=None, params=None):
+    SINGLE_THREAD_PARAMS = {"n_jobs": 1}
+
+    def __init__(self, base_estimator, seed=None, params=None, n_jobs=-1):
         if params is None:
             params = {}
         self.seed = seed
-        reg = MultiOutputRegressor(base_estimator(random_state=self.seed, **params), n_jobs=-1)
+        reg = MultiOutputRegressor(base_estimator(random_state=self.seed, **params), n_jobs=n_jobs)
         self.pipeline = Pipeline(
             [("scaler", StandardScaler()),
              ("regressor", reg)]
@@ -45,18 +142,39 @@ class ScreenPointEstimatorSklearn(ScreenPointEstimator):
 
     def _score(self, X, y):
         y_pred = self.pipeline.predict(X)
-        return mse(y, y_pred, squared=False)
+        # the squared argument is gone from newer scikit-learn, this is what squared=False computed
+        return float(np.sqrt(mse(y, y_pred, multioutput="raw_values")).mean())
 
     def fit(self, df, target_columns: list, train_size=0.7):
+        start = perf_counter()
         X, y = df.drop(columns=target_columns), df[target_columns]
         X_train, X_test, y_train, y_test = train_test_split(X, y, random_state=self.seed, train_size=train_size)
-        self.pipeline.fit(X_train.values, y_train.values)
-        self._train_mse = self._score(X_train, y_train)
-        self._val_mse = self._score(X_test, y_test)
+        self.fit_prepared(self.prepare_data(X_train.values, y_train.values),
+                          self.prepare_data(X_test.values, y_test.values))
+        self._record_dataset(df, target_columns)
+        self.fit_report = {"mode": "full", "samples": len(X_train), "iterations": None,
+                           "seconds": perf_counter() - start}
+
+    def fit_prepared(self, train_data, val_data):
+        self.pipeline.fit(*train_data)
+        self._train_mse = self._score(*train_data)
+        self._val_mse = self._score(*val_data)
 
     def predict(self, X):
         return self.pipeline.predict(X)
 
+    def _save_model(self, artifact):
+        artifact.write_json("params.json", {"seed": self.seed})
+        artifact.write_bytes("model.pkl", pickle.dumps(self.pipeline))
+
+    @classmethod
+    def _load_model(cls, artifact):
+        # the fitted pipeline is restored as a whole, there is nothing to construct
+        estimator = cls.__new__(cls)
+        estimator.seed = artifact.read_json("params.json")["seed"]
+        estimator.pipeline = pickle.loads(artifact.read_bytes("model.pkl"))
+        return estimator
+
     @property
     def train_mse(self):
         return self._train_mse
@@ -67,16 +185,31 @@ class ScreenPointEstimatorSklearn(ScreenPointEstimator):
 
 
 class ScreenPointEstimatorCatboost(ScreenPointEstimator):
-    # use_best_model
-    # early_stopping_rounds
-    # l2_leaf_reg
-    # random_strength
-    def __init__(self, **params):
-        self.seed = params.get("random_seed", None)
+    # the compiled predictor beats CatBoost up to about 8 rows (2000 trees of depth 6), larger batches go through
+    # the native evaluator
+    _COMPILED_MAX_ROWS = 8
+    SINGLE_THREAD_PARAMS = {"thread_count": 1}
+    EARLY_STOPPING = True
+
+    def __init__(self, incremental_iterations=200, drift_tolerance=0.1, max_new_fraction=0.5, **params):
+        self.seed = params.pop("random_seed", None)
         params["loss_function"] = "MultiRMSE"
         params["eval_metric"] = "MultiRMSE"
 
         self.regressor = CatBoostRegressor(random_state=self.seed, **params)
+        self._predictor = None
+        # incremental updates add at most incremental_iterations trees fitted on the new samples only, and fall
+        # back to a full refit if validation error grows by more than drift_tolerance or too much data is new
+        self.incremental_iterations = incremental_iterations
+        self.drift_tolerance = drift_tolerance
+        self.max_new_fraction = max_new_fraction
+        self._X_train = None
+        self._y_train = None
+        self._X_val = None
+        self._y_val = None
+        self._full_fit_val_mse = None
+        # CatBoost callbacks with after_iteration(info), used to stream training progress
+        self.callbacks = None
         self._train_mse = 0
         self._val_mse = 0
 
@@ -90,19 +223,154 @@ class ScreenPointEstimatorCatboost(ScreenPointEstimator):
         )
 
     def fit(self, df, target_columns: list, train_size=0.7):
+        start = perf_counter()
         X, y = df.drop(columns=target_columns), df[target_columns]
         X_train, X_test, y_train, y_test = train_test_split(X, y, random_state=self.seed, train_size=train_size)
-        train_data = self._make_data_pool(X_train.values, y_train.values)
-        test_data = self._make_data_pool(X_test.values, y_test.values)
-        self.regressor.fit(X=train_data, eval_set=test_data)
+        self.fit_prepared(self.prepare_data(X_train.values, y_train.values),
+                          self.prepare_data(X_test.values, y_test.values))
+        self._X_train, self._y_train = X_train.values, y_train.values
+        self._X_val, self._y_val = X_test.values, y_test.values
+        self._full_fit_val_mse = self._val_mse
+        self._compile_predictor(X_test.values)
+        self._record_dataset(df, target_columns)
+        self.fit_report = {"mode": "full", "samples": len(X_train), "iterations": self.regressor.tree_count_,
+                           "seconds": perf_counter() - start}
+
+    def prepare_data(self, X, y=None):
+        return self._make_data_pool(X, y)
+
+    def fit_prepared(self, train_data, val_data):
+        self.regressor.fit(X=train_data, eval_set=val_data, callbacks=self.callbacks)
         best_iter = self.regressor.best_iteration_
         self._train_mse = self.regressor.evals_result_["learn"]["MultiRMSE"][best_iter]
         self._val_mse = self.regressor.evals_result_["validation"]["MultiRMSE"][best_iter]
 
-    def predict(self, X):
+    def update(self, df, target_columns: list, num_new, train_size=0.7):
+        if self._X_val is None or self._X_train is None or num_new > self.max_new_fraction * len(df):
+            return super().update(df, target_columns, num_new, train_size)
+        if num_new <= 0:
+            self.fit_report = {"mode": "none", "samples": 0, "iterations": 0, "seconds": 0.0}
+            return
+
+        start = perf_counter()
+        new = df.iloc[len(df) - num_new:]
+        X, y = new.drop(columns=target_columns).values, new[target_columns].values
+        if num_new > 1:
+            X_train, X_test, y_train, y_test = train_test_split(X, y, random_state=self.seed, train_size=train_size)
+        else:
+            X_train, X_test, y_train, y_test = X, X[:0], y, y[:0]
+        X_val, y_val = np.concatenate([self._X_val, X_test]), np.concatenate([self._y_val, y_test])
+
+        trees = self.regressor.tree_count_
+        regressor = CatBoostRegressor(**{**self.regressor.get_params(), "iterations": self.incremental_iterations})
+        regressor.fit(X=self._make_data_pool(X_train, y_train), eval_set=self._make_data_pool(X_val, y_val),
+                      init_model=self.regressor, callbacks=self.callbacks)
+
+        val_mse = multi_rmse(y_val, regressor.predict(self._make_data_pool(X_val)))
+        if val_mse > self._full_fit_val_mse * (1 + self.drift_tolerance):
+            log.info('Validation RMSE drifted from {:.3f} to {:.3f}, refitting from scratch'.format(
+                self._full_fit_val_mse, val_mse))
+            self.fit(df, target_columns, train_size)
+            self.fit_report["mode"] = "full (drift)"
+            self.fit_report["seconds"] = perf_counter() - start
+            return
+
+        self.regressor = regressor
+        # scored on the whole training part like after a full fit, not only on the new rows
+        self._X_train = np.concatenate([self._X_train, X_train])
+        self._y_train = np.concatenate([self._y_train, y_train])
+        self._train_mse = multi_rmse(self._y_train, regressor.predict(self._make_data_pool(self._X_train)))
+        self._val_mse = val_mse
+        self._X_val, self._y_val = X_val, y_val
+        self._compile_predictor(X_val)
+        self._record_dataset(df, target_columns)
+        self.fit_report = {"mode": "incremental", "samples": len(X_train), "iterations": regressor.tree_count_ - trees,
+                           "seconds": perf_counter() - start}
+
+    def _compile_predictor(self, X_check):
+        self._predictor = None
+        try:
+            predictor = ObliviousTreesPredictor.from_catboost(self.regressor)
+        except (ValueError, KeyError) as e:
+            log.warning('Unable to compile the CatBoost model, predictions go through Pool: {}'.format(e))
+            return
+        expected = self.regressor.predict(self._make_data_pool(X_check))
+        if not np.allclose(predictor.predict(X_check), expected, rtol=1e-5, atol=1e-3):
+            log.warning('Compiled CatBoost model does not match the original, predictions go through Pool')
+            return
+        self._predictor = predictor
+
+    _PREDICTOR_ARRAYS = ("features", "borders", "leaf_values", "bias")
+
+    def _save_model(self, artifact):
+        params = self.regressor.get_params()
+        for key in ("random_state", "random_seed", "loss_function", "eval_metric"):
+            params.pop(key, None)
+        artifact.write_json("params.json", {
+            "params": params,
+            "random_seed": self.seed,
+            "incremental_iterations": self.incremental_iterations,
+            "drift_tolerance": self.drift_tolerance,
+            "max_new_fraction": self.max_new_fraction,
+            "full_fit_val_rmse": self._full_fit_val_mse,
+            "predictor_scale": None if self._predictor is None else self._predictor.scale,
+        })
+
+        fd, path = tempfile.mkstemp(suffix=".cbm")
+        os.close(fd)
+        try:
+            self.regressor.save_model(path)
+            with open(path, "rb") as f:
+                artifact.write_bytes("model.cbm", f.read())
+        finally:
+            os.remove(path)
+
+        # the training and validation splits are kept for incremental updates of a loaded model
+        if self._X_train is not None:
+            artifact.write_array("train/X.npy", self._X_train)
+            artifact.write_array("train/y.npy", self._y_train)
+        if self._X_val is not None:
+            artifact.write_array("val/X.npy", self._X_val)
+            artifact.write_array("val/y.npy", self._y_val)
+        if self._predictor is not None:
+            for name in self._PREDICTOR_ARRAYS:
+                artifact.write_array("predictor/{}.npy".format(name), getattr(self._predictor, name))
+
+    @classmethod
+    def _load_model(cls, artifact):
+        params = artifact.read_json("params.json")
+        estimator = cls(incremental_iterations=params["incremental_iterations"],
+                        drift_tolerance=params["drift_tolerance"],
+                        max_new_fraction=params["max_new_fraction"],
+                        random_seed=params["random_seed"],
+                        **params["params"])
+        estimator.regressor.load_model(blob=artifact.read_bytes("model.cbm"))
+        estimator._full_fit_val_mse = params["full_fit_val_rmse"]
+
+        if "train/X.npy" in artifact:
+            estimator._X_train = artifact.read_array("train/X.npy")
+            estimator._y_train = artifact.read_array("train/y.npy")
+        if "val/X.npy" in artifact:
+            estimator._X_val = artifact.read_array("val/X.npy")
+            estimator._y_val = artifact.read_array("val/y.npy")
+        if params["predictor_scale"] is not None:
+            arrays = {name: artifact.read_array("predictor/{}.npy".format(name)) for name in cls._PREDICTOR_ARRAYS}
+            estimator._predictor = ObliviousTreesPredictor(scale=params["predictor_scale"], **arrays)
+        return estimator
+
+    @property
+    def feature_importances(self):
+        return self.regressor.get_feature_importance()
+
+    def predict_pool(self, X):
         X_ = self._make_data_pool(X)
         return self.regressor.predict(X_)
 
+    def predict(self, X):
+        if self._predictor is None or len(X) > self._COMPILED_MAX_ROWS:
+            return self.predict_pool(X)
+        return self._predictor.predict(X)
+
     @property
     def train_mse(self):
         return self._train_mse
@@ -110,3 +378,259 @@ class ScreenPointEstimatorCatboost(ScreenPointEstimator):
     @property
     def val_mse(self):
         return self._val_mse
+
+
+class _StandardizedEstimator(ScreenPointEstimator):
+    """Base of the estimators fitted directly with NumPy on standardized features, a fit takes milliseconds."""
+
+    def __init__(self, seed=None):
+        self.seed = seed
+        self._mean = None
+        self._scale = None
+        self._train_mse = 0
+        self._val_mse = 0
+
+    @abstractmethod
+    def _fit_standardized(self, X, y):
+        ...
+
+    @abstractmethod
+    def _predict_standardized(self, X):
+        ...
+
+    @abstractmethod
+    def _params(self):
+        """Constructor arguments, saved with the model."""
+        ...
+
+    @abstractmethod
+    def _arrays(self):
+        """Fitted arrays by name, saved with the model and passed to _set_arrays on load."""
+        ...
+
+    @abstractmethod
+    def _set_arrays(self, arrays):
+        ...
+
+    def _standardize(self, X):
+        return (np.asarray(X, dtype=np.float64) - self._mean) / self._scale
+
+    def fit(self, df, target_columns: list, train_size=0.7):
+        start = perf_counter()
+        X, y = df.drop(columns=target_columns).values, df[target_columns].values
+        X_train, X_test, y_train, y_test = train_test_split(X, y, random_state=self.seed, train_size=train_size)
+        self.fit_prepared((X_train, y_train), (X_test, y_test))
+        self._record_dataset(df, target_columns)
+        self.fit_report = {"mode": "full", "samples": len(X_train), "iterations": None,
+                           "seconds": perf_counter() - start}
+
+    def fit_prepared(self, train_data, val_data):
+        X, y = train_data
+        self._mean = X.mean(axis=0)
+        self._scale = X.std(axis=0)
+        self._scale[self._scale == 0] = 1
+        self._fit_standardized(self._standardize(X), np.asarray(y, dtype=np.float64))
+        self._train_mse = multi_rmse(y, self.predict(X))
+        self._val_mse = multi_rmse(val_data[1], self.predict(val_data[0])) if len(val_data[0]) else 0
+
+    def predict(self, X):
+        return self._predict_standardized(self._standardize(X))
+
+    @property
+    def train_mse(self):
+        return self._train_mse
+
+    @property
+    def val_mse(self):
+        return self._val_mse
+
+    def _save_model(self, artifact):
+        artifact.write_json("params.json", self._params())
+        arrays = {"mean": self._mean, "scale": self._scale, **self._arrays()}
+        for name, array in arrays.items():
+            artifact.write_array("arrays/{}.npy".format(name), array)
+        artifact.write_json("arrays.json", list(arrays))
+
+    @classmethod
+    def _load_model(cls, artifact):
+        estimator = cls(**artifact.read_json("params.json"))
+        arrays = {name: artifact.read_array("arrays/{}.npy".format(name)) for name in artifact.read_json("arrays.json")}
+        estimator._mean = arrays.pop("mean")
+        estimator._scale = arrays.pop("scale")
+        estimator._set_arrays(arrays)
+        return estimator
+
+
+class ScreenPointEstimatorRidge(_StandardizedEstimator):
+    """Ridge regression solved in closed form on the standardized features and their powers up to degree."""
+
+    def __init__(self, alpha=1.0, degree=1, seed=None):
+        super(ScreenPointEstimatorRidge, self).__init__(seed)
+        self.alpha = alpha
+        self.degree = degree
+        self._offset = None
+        self._coef = None
+        self._intercept = None
+
+    def _expand(self, X):
+        if self.degree == 1:
+            return X
+        return np.concatenate([X ** power for power in range(1, self.degree + 1)], axis=1)
+
+    def _fit_standardized(self, X, y):
+        X = self._expand(X)
+        # centering leaves the intercept out of the penalty, it is the mean target
+        self._offset = X.mean(axis=0)
+        X = X - self._offset
+        self._intercept = y.mean(axis=0)
+        gram = X.T @ X
+        gram[np.diag_indices_from(gram)] += self.alpha
+        self._coef = np.linalg.solve(gram, X.T @ (y - self._intercept))
+
+    def _predict_standardized(self, X):
+        return (self._expand(X) - self._offset) @ self._coef + self._intercept
+
+    def _params(self):
+        return {"alpha": self.alpha, "degree": self.degree, "seed": self.seed}
+
+    def _arrays(self):
+        return {"offset": self._offset, "coef": self._coef, "intercept": self._intercept}
+
+    def _set_arrays(self, arrays):
+        self._offset, self._coef, self._intercept = arrays["offset"], arrays["coef"], arrays["intercept"]
+
+
+class ScreenPointEstimatorKNN(_StandardizedEstimator):
+    """Mean screen point of the k nearest training samples in a KD-tree over the standardized features.
+
+    weights is "uniform" or "distance" (inverse distance weighting).
+    """
+
+    def __init__(self, n_neighbors=5, weights="distance", leaf_size=40, seed=None):
+        super(ScreenPointEstimatorKNN, self).__init__(seed)
+        if weights not in ("uniform", "distance"):
+            raise ValueError("Unknown weights {}".format(weights))
+        self.n_neighbors = n_neighbors
+        self.weights = weights
+        self.leaf_size = leaf_size
+        self._X = None
+        self._y = None
+        self._tree = None
+
+    def _fit_standardized(self, X, y):
+        self._X, self._y = X, y
+        self._tree = KDTree(X, leaf_size=self.leaf_size)
+
+    def _predict_standardized(self, X):
+        distances, indices = self._tree.query(X, k=min(self.n_neighbors, len(self._y)))
+        if self.weights == "uniform":
+            return self._y[indices].mean(axis=1)
+        weights = 1 / (distances + 1e-9)
+        return (weights[..., None] * self._y[indices]).sum(axis=1) / weights.sum(axis=1, keepdims=True)
+
+    def _params(self):
+        return {"n_neighbors": self.n_neighbors, "weights": self.weights, "leaf_size": self.leaf_size, "seed": self.seed}
+
+    def _arrays(self):
+        return {"X": self._X, "y": self._y}
+
+    def _set_arrays(self, arrays):
+        # the tree is rebuilt from the saved samples, which takes about as long as reading a pickled one
+        self._fit_standardized(arrays["X"], arrays["y"])
+
+
+class ScreenPointEstimatorGeometric(ScreenPointEstimator):
+    """Casts the gaze ray from the 3D eye position onto the screen plane.
+
+    With the midpoint of the eyes (u, v) in pixels, the distance to the face d and the gaze vector g, the ray meets a
+    plane z = z0 parallel to the camera at (u - cx) * d / f + (z0 - d) * gx / gz (and alike for y). A screen point is
+    then linear in [u * d, v * d, d, d * gx / gz, d * gy / gz, gx / gz, gy / gz, 1], so the screen pose and scale and
+    the camera intrinsics reduce to 8 parameters per screen axis, fitted by (ridge) least squares from a few clicks.
+    Without depth (distance_to_face is 0) d is taken as inversely proportional to the distance between the eyes.
+    """
+    COLUMNS = ["left_eye_position_x", "left_eye_position_y", "right_eye_position_x", "right_eye_position_y",
+               "distance_to_face", "gaze_direction_ox", "gaze_direction_oy", "gaze_direction_oz"]
+    # distance in metres * pixels between the eyes, about 63 mm between the eyes and a focal length of 600 px
+    _DEFAULT_PROXY_SCALE = 40.0
+    _MIN_GAZE_Z = 1e-3
+
+    def __init__(self, alpha=1e-3, seed=None):
+        self.alpha = alpha
+        self.seed = seed
+        self._index = None
+        self._proxy_scale = self._DEFAULT_PROXY_SCALE
+        self._coef = None
+        self._train_mse = 0
+        self._val_mse = 0
+
+    def _design(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        left_x, left_y, right_x, right_y, distance, gaze_x, gaze_y, gaze_z = X[:, self._index].T
+        u, v = (left_x + right_x) / 2, (left_y + right_y) / 2
+        proxy = self._proxy_scale / np.maximum(np.hypot(right_x - left_x, right_y - left_y), 1)
+        d = np.where(distance > 0, distance, proxy)
+        gaze_z = np.where(gaze_z < 0, np.minimum(gaze_z, -self._MIN_GAZE_Z), np.maximum(gaze_z, self._MIN_GAZE_Z))
+        tan_x, tan_y = gaze_x / gaze_z, gaze_y / gaze_z
+        return np.stack([u * d, v * d, d, d * tan_x, d * tan_y, tan_x, tan_y, np.ones_like(d)], axis=1)
+
+    def fit(self, df, target_columns: list, train_size=0.7):
+        start = perf_counter()
+        self._record_dataset(df, target_columns)
+        X, y = df.drop(columns=target_columns).values, df[target_columns].values
+        X_train, X_test, y_train, y_test = train_test_split(X, y, random_state=self.seed, train_size=train_size)
+        self.fit_prepared((X_train, y_train), (X_test, y_test))
+        self.fit_report = {"mode": "full", "samples": len(X_train), "iterations": None,
+                           "seconds": perf_counter() - start}
+
+    def fit_prepared(self, train_data, val_data):
+        if self.feature_names is None:
+            raise RuntimeError("The feature names are needed to find the columns {}".format(self.COLUMNS))
+        missing = [column for column in self.COLUMNS if column not in self.feature_names]
+        if missing:
+            raise ValueError("The features do not have the columns {}".format(missing))
+        self._index = np.array([self.feature_names.index(column) for column in self.COLUMNS])
+
+        X, y = train_data
+        # the proxy is calibrated against the rows with depth, so rows without it land on the same scale
+        distance = X[:, self._index[4]]
+        eyes = np.hypot(X[:, self._index[2]] - X[:, self._index[0]], X[:, self._index[3]] - X[:, self._index[1]])
+        has_depth = distance > 0
+        self._proxy_scale = (float(np.median(distance[has_depth] * eyes[has_depth])) if has_depth.any()
+                             else self._DEFAULT_PROXY_SCALE)
+
+        A = self._design(X)
+        scale = np.sqrt((A ** 2).mean(axis=0))
+        scale[scale == 0] = 1
+        # the intercept is not penalized
+        penalty = np.sqrt(self.alpha * len(A)) * np.eye(A.shape[1])[:-1]
+        coef, *_ = np.linalg.lstsq(np.vstack([A / scale, penalty]),
+                                   np.vstack([y, np.zeros((len(penalty), y.shape[1]))]), rcond=None)
+        self._coef = coef / scale[:, None]
+
+        self._train_mse = multi_rmse(y, self.predict(X))
+        self._val_mse = multi_rmse(val_data[1], self.predict(val_data[0])) if len(val_data[0]) else 0
+
+    def predict(self, X):
+        return self._design(X) @ self._coef
+
+    @property
+    def train_mse(self):
+        return self._train_mse
+
+    @property
+    def val_mse(self):
+        return self._val_mse
+
+    def _save_model(self, artifact):
+        artifact.write_json("params.json", {"alpha": self.alpha, "seed": self.seed, "proxy_scale": self._proxy_scale,
+                                            "index": self._index.tolist()})
+        artifact.write_array("coef.npy", self._coef)
+
+    @classmethod
+    def _load_model(cls, artifact):
+        params = artifact.read_json("params.json")
+        estimator = cls(alpha=params["alpha"], seed=params["seed"])
+        estimator._proxy_scale = params["proxy_scale"]
+        estimator._index = np.array(params["index"])
+        estimator._coef = artifact.read_array("coef.npy")
+        return estimator
@@ -0,0 +1,88 @@
+import logging as log
+from time import perf_counter
+
+from hydra.utils import get_class
+from omegaconf import DictConfig
+
+
+class StageGraph:
+    FRAME = "frame"
+
+    class Stage:
+        def __init__(self, name, estimator, inputs):
+            self.name = name
+            self.estimator = estimator
+            self.inputs = list(inputs)
+
+        @property
+        def is_root(self):
+            return all(input == StageGraph.FRAME for input in self.inputs)
+
+    def __init__(self, core, args: DictConfig, graph: DictConfig):
+        self.stages = {}
+        for name, stage in graph.stages.items():
+            estimator = get_class(stage.estimator)(core, args[stage.config])
+            self.stages[name] = StageGraph.Stage(name, estimator, stage.inputs)
+        self.outputs = list(graph.outputs)
+        self._check()
+
+        # seconds from start to completion of every stage of the last run
+        self.timings = {}
+        self._root_start_times = {}
+
+    def _check(self):
+        known = {self.FRAME}
+        remaining = list(self.stages.values())
+        while remaining:
+            ready = [stage for stage in remaining if set(stage.inputs) <= known]
+            if not ready:
+                raise RuntimeError("Stage graph has unknown inputs or cycles: {}".format(
+                    [stage.name for stage in remaining]))
+            known.update(stage.name for stage in ready)
+            remaining = [stage for stage in remaining if stage not in ready]
+        for output in self.outputs:
+            if output not in self.stages:
+                raise RuntimeError("Unknown output stage {}".format(output))
+
+    @property
+    def roots(self):
+        return [stage for stage in self.stages.values() if stage.is_root]
+
+    def deploy(self, device, root_requests=1, requests=1, cache=None, config=None):
+        for stage in self.stages.values():
+            stage.estimator.deploy(device, root_requests if stage.is_root else requests, cache, config)
+
+    def start(self, frame, tag=0):
+        self._root_start_times[tag] = perf_counter()
+        for stage in self.roots:
+            stage.estimator.start_async(frame, tag=tag)
+
+    def run(self, frame, tag=0, started=False, max_results=None):
+        """Runs every stage as soon as its inputs are ready, root stages are skipped if already started."""
+        results = {self.FRAME: frame}
+        start_times = {}
+        pending = list(self.stages.values())
+        running = []
+        if started:
+            running = self.roots
+            pending = [stage for stage in pending if not stage.is_root]
+            start_time = self._root_start_times.pop(tag, perf_counter())
+            start_times.update((stage.name, start_time) for stage in running)
+
+        while pending or running:
+            for stage in [stage for stage in pending if all(input in results for input in stage.inputs)]:
+                start_times[stage.name] = perf_counter()
+                stage.estimator.start_async(*(results[input] for input in stage.inputs), tag=tag)
+                running.append(stage)
+                pending.remove(stage)
+
+            stage = running.pop(0)
+            output = stage.estimator.postprocess(tag)
+            self.timings[stage.name] = perf_counter() - start_times[stage.name]
+            if stage.is_root and max_results is not None and max_results < len(output):
+                log.debug('Too many results of {}. Will be processed only {} of {}'
+                          .format(stage.name, max_results, len(output)))
+                output = output[:max_results]
+            results[stage.name] = output
+
+        return [results[output] for output in self.outputs]
@@ -5,31 +5,76 @@ from src.utils import resize_image
 
 
 class HeatmapRenderer:
-    def __init__(self, size, bg=None, radius=175, filling_rate=8, decay_rate=0.98):  # (w, h)
+    # the accumulated heatmap is divided by a global scale, so decay is a single multiplication per step
+    _MIN_SCALE = 1e-3
+    _ALPHA = 0.03
+
+    def __init__(self, size, bg=None, radius=175, filling_rate=8, decay_rate=0.98, recompose_every=30):  # (w, h)
         self.bg = resize_image(bg, size) if bg is not None else None
         self._decay_rate = decay_rate
+        # a step recolours only the window it drew into, the decay of the rest of the image shows up on a full
+        # recolour every recompose_every steps
+        self._recompose_every = recompose_every
         self._filling_rate = filling_rate
         self._size = size
         self._radius = radius
+        self._kernel = self._make_kernel(radius, filling_rate)
+        self.version = 0  # changes whenever the composed heatmap does
         self.clear()
 
+    @staticmethod
+    def _make_kernel(radius, filling_rate):
+        mask = np.ogrid[-radius:radius + 1, -radius:radius + 1]
+        dist = np.sqrt(mask[0] ** 2 + mask[1] ** 2)
+        return ((radius - dist).clip(0, radius) * filling_rate).astype(np.float32)
+
+    def _window(self, point):  # (x, y)
+        x, y = np.rint(np.clip(point, [0, 0], [self._size[0], self._size[1]])).astype(int)
+        r = self._radius
+        x_min, x_max = max(x - r, 0), min(x + r + 1, self._size[0])
+        y_min, y_max = max(y - r, 0), min(y + r + 1, self._size[1])
+        heatmap_window = (slice(y_min, y_max), slice(x_min, x_max))
+        kernel_window = (slice(y_min - y + r, y_max - y + r), slice(x_min - x + r, x_max - x + r))
+        return heatmap_window, kernel_window
+
     def step(self, point):  # (x, y)
-        p = np.clip(point, [0, 0], [self._size[0], self._size[1]])
-        self._heatmap = self._heatmap * self._decay_rate
+        self._scale *= self._decay_rate
+        if self._scale < self._MIN_SCALE:
+            self._heatmap *= self._scale
+            self._scale = 1.0
 
-        mask = np.ogrid[:self._size[1], :self._size[0]]
-        dist = np.sqrt((mask[0] - p[1]) ** 2 + (mask[1] - p[0]) ** 2)
-        dist = (self._radius - dist).clip(0, self._radius)
-        self._heatmap = self._heatmap + dist * self._filling_rate
-        self._heatmap.clip(0, 255)
+        heatmap_window, kernel_window = self._window(point)
+        self._heatmap[heatmap_window] += self._kernel[kernel_window] / self._scale
+
+        self._dirty.append(heatmap_window)
+        self._steps_since_compose += 1
 
     def clear(self):
-        self._heatmap = np.full(shape=(self._size[1], self._size[0]), fill_value=255, dtype="uint8")
+        self._heatmap = np.full(shape=(self._size[1], self._size[0]), fill_value=255, dtype=np.float32)
+        self._scale = 1.0
+        self._dirty = []
+        self._composed = None
+        self._steps_since_compose = 0
 
-    @property
-    def heatmap(self):
-        color_map = cv2.applyColorMap(cv2.convertScaleAbs(self._heatmap, alpha=0.03), cv2.COLORMAP_TURBO)
+    def _compose(self, window=(slice(None), slice(None))):
+        color_map = cv2.applyColorMap(
+            cv2.convertScaleAbs(self._heatmap[window], alpha=self._ALPHA * self._scale), cv2.COLORMAP_TURBO)
         color_map = cv2.cvtColor(color_map, cv2.COLOR_BGR2RGB)
         if self.bg is not None:
-            color_map = cv2.addWeighted(color_map, 0.7, self.bg, 0.3, 0)
+            color_map = cv2.addWeighted(color_map, 0.7, np.ascontiguousarray(self.bg[window]), 0.3, 0)
         return color_map
+
+    @property
+    def heatmap(self):
+        # the returned image is cached and shared between calls, it must not be modified
+        if self._composed is None or self._steps_since_compose >= self._recompose_every:
+            self._composed = self._compose()
+            self._steps_since_compose = 0
+            self._dirty = []
+            self.version += 1
+        elif self._dirty:
+            for window in self._dirty:
+                self._composed[window] = self._compose(window)
+            self._dirty = []
+            self.version += 1
+        return self._composed
@@ -0,0 +1 @@
+from .processing_worker import ProcessingWorker
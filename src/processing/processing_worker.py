@@ -0,0 +1,156 @@
+import logging as log
+import queue
+import threading
+import time
+
+import numpy as np
+
+from ..utils import draw_detections, resize_image, get_distance, FpsCounter
+
+
+class ProcessingWorker:
+    """Runs capture, the frame processor and the screen point prediction on a thread.
+
+    Results go to a bounded queue, the oldest result is dropped when the consumer falls behind. predictor and
+    predicting can be changed at any time, the worker picks them up on the next frame. A frame that fails is logged
+    and skipped, the worker goes on with the next one.
+    """
+    _IDLE_SLEEP = 0.001
+    # pause after a failed frame, so a source that keeps failing does not spin
+    _ERROR_SLEEP = 0.1
+
+    class Result:
+        def __init__(self, stream, frame_id, preview, rois, landmarks, gazes, head_poses, distance, screen_point):
+            self.stream = stream
+            self.frame_id = frame_id
+            self.preview = preview  # downscaled frame with the detections drawn, None without preview_size
+            self.rois = rois
+            self.landmarks = landmarks
+            self.gazes = gazes
+            self.head_poses = head_poses
+            self.distance = distance  # to the first face, 0 without depth
+            self.screen_point = screen_point  # of the first face, None unless predicting
+            self.timestamp = time.time()
+
+    class Predictor:
+        """A screen point estimator with the feature transformer of its schema, published in a single assignment."""
+
+        def __init__(self, estimator, features):
+            if estimator.feature_names is not None and estimator.feature_names != features.feature_names:
+                raise ValueError("The estimator was fitted on other features than {}".format(features.feature_names))
+            self.estimator = estimator
+            self.features = features
+
+    def __init__(self, video_capture, frame_processor, data_collector, preview_size, queue_size=2, stream=0):
+        self.stream = stream  # index of the camera when several are served
+        self.video_capture = video_capture
+        self.frame_processor = frame_processor
+        self.data_collector = data_collector
+        self.preview_size = preview_size  # (w, h), None for no preview
+        self.predictor = None
+        self.predicting = False
+        self.dropped = 0
+        self.fps = FpsCounter()
+        self._features_row = None
+        self._results = queue.Queue(maxsize=queue_size)
+        self.errors = 0
+        self.last_error = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="processing-{}".format(stream), daemon=True)
+        self._thread.start()
+
+    def _predict(self, roi, eyes, head_pose, gaze, distance):
+        # a single read, the estimator and its feature schema always belong together
+        predictor = self.predictor
+        if not self.predicting or predictor is None:
+            return None
+        num_features = predictor.features.num_features
+        if self._features_row is None or len(self._features_row) != num_features:
+            self._features_row = np.empty(num_features)
+        X = self.data_collector.make_row(face_position=roi.position,
+                                         face_size=roi.size,
+                                         distance_to_face=distance,
+                                         left_eye_position=eyes.position[0],
+                                         right_eye_position=eyes.position[1],
+                                         eyes_size=eyes.size,
+                                         head_pose=head_pose,
+                                         gaze_direction=gaze, feature_augmentation=True,
+                                         features=predictor.features, out=self._features_row)
+        return predictor.estimator.predict([X])[0]
+
+    def _process(self, color_frame, depth_frame):
+        # results may belong to one of the previous frames
+        processed = self.frame_processor.process_pipelined(color_frame, depth_frame)
+        if processed is None:
+            return None
+        frame_id, color_frame, depth_frame, (rois, landmarks, gazes, head_poses) = processed
+
+        distance, screen_point = 0, None
+        if rois:
+            if depth_frame is not None:
+                distance = get_distance(depth_frame, rois[0].position, rois[0].size)
+            screen_point = self._predict(rois[0], landmarks[0], head_poses[0], gazes[0], distance)
+
+        preview = None
+        if self.preview_size is not None:
+            draw_detections(color_frame, (rois, landmarks, gazes))
+            preview = resize_image(color_frame, self.preview_size)
+        return self.Result(self.stream, frame_id, preview, rois, landmarks, gazes, head_poses, distance, screen_point)
+
+    def _publish(self, result):
+        while True:
+            try:
+                self._results.put_nowait(result)
+                return
+            except queue.Full:
+                try:
+                    self._results.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def _step(self):
+        color_frame, depth_frame = self.video_capture.get_frame()
+        if color_frame is None:
+            time.sleep(self._IDLE_SLEEP)
+            return
+        result = self._process(color_frame, depth_frame)
+        if result is not None:
+            self.fps.tick()
+            self._publish(result)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self._step()
+            except Exception as e:
+                # the traceback is logged once per kind of error, repeats are only counted
+                if repr(e) != repr(self.last_error):
+                    log.exception('Frame processing failed, skipping the frame')
+                self.errors += 1
+                self.last_error = e
+                time.sleep(self._ERROR_SLEEP)
+
+    @property
+    def estimator(self):
+        predictor = self.predictor
+        return None if predictor is None else predictor.estimator
+
+    def results(self, timeout=None):
+        """Results published since the previous call, oldest first, waiting up to timeout seconds for the first one."""
+        results = []
+        if timeout is not None:
+            try:
+                results.append(self._results.get(timeout=timeout))
+            except queue.Empty:
+                return results
+        while True:
+            try:
+                results.append(self._results.get_nowait())
+            except queue.Empty:
+                return results
+
+    def close(self):
+        self._stop.set()
+        if self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join()
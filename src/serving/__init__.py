@@ -0,0 +1,2 @@
+from .protocol import encode_result, decode_result, read_results
+from .result_server import ResultServer, parse_address
@@ -0,0 +1,74 @@
+import struct
+
+import numpy as np
+
+
+# a message is a little-endian uint32 payload length followed by the payload: a header and num_faces face records
+MAGIC = b"GZTR"
+VERSION = 2
+_LENGTH = struct.Struct("<I")
+# magic, version, stream, frame id, timestamp (unix seconds), distance to the first face, num faces, has screen point, screen point
+_HEADER = struct.Struct("<4sHHQdfB?2f")
+# face roi (x, y, w, h), eye centers (left x, y, right x, y), eyes size (w, h), head pose (yaw, pitch, roll),
+# gaze vector (x, y, z)
+_FACE = struct.Struct("<16f")
+_MAX_FACES = 255
+
+
+def encode_result(result):
+    """Length-prefixed message of a ProcessingWorker.Result."""
+    faces = list(zip(result.rois, result.landmarks, result.head_poses, result.gazes))[:_MAX_FACES]
+    screen_point = result.screen_point
+    header = _HEADER.pack(MAGIC, VERSION, result.stream, result.frame_id, result.timestamp, result.distance,
+                          len(faces), screen_point is not None, *(screen_point if screen_point is not None else (0, 0)))
+    records = [_FACE.pack(*roi.position, *roi.size, *np.ravel(eyes.center), *eyes.size, *head_pose, *gaze)
+               for roi, eyes, head_pose, gaze in faces]
+    payload = b"".join([header, *records])
+    return _LENGTH.pack(len(payload)) + payload
+
+
+def decode_result(payload):
+    (magic, version, stream, frame_id, timestamp, distance, num_faces, has_screen_point,
+     x, y) = _HEADER.unpack_from(payload)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Unsupported message {!r} version {}".format(magic, version))
+    faces = []
+    for i in range(num_faces):
+        values = _FACE.unpack_from(payload, _HEADER.size + i * _FACE.size)
+        faces.append({
+            "roi": values[0:4],
+            "eye_centers": (values[4:6], values[6:8]),
+            "eyes_size": values[8:10],
+            "head_pose": values[10:13],
+            "gaze": values[13:16],
+        })
+    return {
+        "stream": stream,
+        "frame_id": frame_id,
+        "timestamp": timestamp,
+        "distance": distance,
+        "screen_point": (x, y) if has_screen_point else None,
+        "faces": faces,
+    }
+
+
+def _read_exactly(sock, size):
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return bytes(data)
+
+
+def read_results(sock):
+    """Decoded messages from a connected subscriber socket until the server closes it."""
+    while True:
+        length = _read_exactly(sock, _LENGTH.size)
+        if length is None:
+            return
+        payload = _read_exactly(sock, _LENGTH.unpack(length)[0])
+        if payload is None:
+            return
+        yield decode_result(payload)
@@ -0,0 +1,120 @@
+import logging as log
+import os
+import queue
+import socket
+import threading
+
+
+def parse_address(address):
+    """(family, socket address) of "unix:<path>" or "tcp:<host>:<port>"."""
+    scheme, _, target = address.partition(":")
+    if scheme == "unix" and target:
+        return socket.AF_UNIX, target
+    if scheme == "tcp":
+        host, _, port = target.rpartition(":")
+        if host and port.isdigit():
+            return socket.AF_INET, (host, int(port))
+    raise ValueError("Unsupported address {}, expected unix:<path> or tcp:<host>:<port>".format(address))
+
+
+class _Subscriber:
+    def __init__(self, connection, name, queue_size):
+        self.connection = connection
+        self.name = name
+        self.dropped = 0
+        self.closed = False
+        self._messages = queue.Queue(maxsize=queue_size)
+        self._thread = threading.Thread(target=self._run, name="subscriber {}".format(name), daemon=True)
+        self._thread.start()
+
+    def send(self, message):
+        while not self.closed:
+            try:
+                self._messages.put_nowait(message)
+                return
+            except queue.Full:
+                try:
+                    self._messages.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def _run(self):
+        try:
+            while True:
+                message = self._messages.get()
+                if message is None:
+                    break
+                self.connection.sendall(message)
+        except OSError as e:
+            log.info('Subscriber {} disconnected: {}'.format(self.name, e))
+        finally:
+            self.closed = True
+            self.connection.close()
+
+    def close(self):
+        self.closed = True
+        try:
+            self._messages.put_nowait(None)
+        except queue.Full:
+            self.connection.close()
+
+
+class ResultServer:
+    """Accepts any number of subscribers on a Unix or TCP socket and sends every published message to all of them.
+
+    Each subscriber has its own bounded queue and sender thread, a slow subscriber loses its oldest messages instead of
+    holding back the others.
+    """
+
+    def __init__(self, address, queue_size=64):
+        self.family, self.address = parse_address(address)
+        self.queue_size = queue_size
+        if self.family == socket.AF_UNIX and os.path.exists(self.address):
+            os.remove(self.address)  # left behind by a previous run
+        self._socket = socket.socket(self.family, socket.SOCK_STREAM)
+        if self.family == socket.AF_INET:
+            self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._socket.bind(self.address)
+        self._socket.listen()
+
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._accept, name="result-server", daemon=True)
+        self._thread.start()
+
+    def _accept(self):
+        while not self._closed:
+            try:
+                connection, peer = self._socket.accept()
+            except OSError:
+                break
+            if self.family == socket.AF_INET:
+                connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            name = peer or "#{}".format(connection.fileno())
+            log.info('Subscriber {} connected'.format(name))
+            with self._lock:
+                self._subscribers.append(_Subscriber(connection, name, self.queue_size))
+
+    @property
+    def num_subscribers(self):
+        with self._lock:
+            return sum(not subscriber.closed for subscriber in self._subscribers)
+
+    def publish(self, message):
+        with self._lock:
+            self._subscribers = [subscriber for subscriber in self._subscribers if not subscriber.closed]
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            subscriber.send(message)
+
+    def close(self):
+        self._closed = True
+        self._socket.close()
+        with self._lock:
+            for subscriber in self._subscribers:
+                subscriber.close()
+            self._subscribers = []
+        if self.family == socket.AF_UNIX and os.path.exists(self.address):
+            os.remove(self.address)
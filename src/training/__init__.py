@@ -0,0 +1,3 @@
+from .background_trainer import BackgroundTrainer
+from .hyperparameter_search import HyperparameterSearch
+from .feature_selection import FeatureSelection, permutation_importance
@@ -0,0 +1,102 @@
+import multiprocessing as mp
+import queue
+import time
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+import pandas as pd
+
+
+class _ProgressCallback:
+    def __init__(self, messages, interval=0.2):
+        self.messages = messages
+        self.interval = interval
+        self._last = 0
+
+    def after_iteration(self, info):
+        now = time.monotonic()
+        if now - self._last >= self.interval:
+            self._last = now
+            learn = info.metrics.get("learn", {}).get("MultiRMSE", [None])[-1]
+            validation = info.metrics.get("validation", {}).get("MultiRMSE", [None])[-1]
+            self.messages.put(("progress", info.iteration, learn, validation))
+        return True
+
+
+def _train(estimator, shm_name, shape, dtype, columns, target_columns, num_new, messages):
+    shm = SharedMemory(name=shm_name)
+    try:
+        df = pd.DataFrame(np.ndarray(shape, dtype=dtype, buffer=shm.buf), columns=columns, copy=False)
+        estimator.callbacks = [_ProgressCallback(messages)]
+        if num_new is None:
+            estimator.fit(df, target_columns)
+        else:
+            estimator.update(df, target_columns, num_new)
+        estimator.callbacks = None
+        del df
+        messages.put(("done", estimator))
+    except Exception as e:
+        messages.put(("error", repr(e)))
+    finally:
+        shm.close()
+
+
+class BackgroundTrainer:
+    """Fits a screen point estimator in a separate process on a shared-memory copy of the dataset.
+
+    poll() returns ("progress", iteration, learn_rmse, val_rmse), ("done", fitted_estimator) and ("error", message)
+    messages, the fitted estimator is a new object that the caller swaps in place of the live one.
+    """
+
+    def __init__(self):
+        self._context = mp.get_context("spawn")
+        self._process = None
+        self._messages = None
+        self._shm = None
+
+    @property
+    def is_running(self):
+        return self._process is not None
+
+    def start(self, estimator, df: pd.DataFrame, target_columns, num_new=None):
+        if self.is_running:
+            raise RuntimeError("Training is already running")
+        data = np.ascontiguousarray(df.values)
+        self._shm = SharedMemory(create=True, size=max(data.nbytes, 1))
+        np.ndarray(data.shape, dtype=data.dtype, buffer=self._shm.buf)[:] = data
+
+        self._messages = self._context.Queue()
+        self._process = self._context.Process(
+            target=_train,
+            args=(estimator, self._shm.name, data.shape, data.dtype.str, list(df.columns), list(target_columns),
+                  num_new, self._messages),
+            daemon=True,
+        )
+        self._process.start()
+
+    def poll(self):
+        messages = []
+        if not self.is_running:
+            return messages
+        while True:
+            try:
+                message = self._messages.get_nowait()
+            except queue.Empty:
+                break
+            messages.append(message)
+            if message[0] in ("done", "error"):
+                self._finish()
+                return messages
+
+        if not self._process.is_alive() and self._messages.empty():
+            messages.append(("error", "Training process exited with code {}".format(self._process.exitcode)))
+            self._finish()
+        return messages
+
+    def _finish(self):
+        self._process.join(timeout=1)
+        self._process = None
+        self._messages = None
+        self._shm.close()
+        self._shm.unlink()
+        self._shm = None
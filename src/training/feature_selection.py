@@ -0,0 +1,119 @@
+import time
+
+import numpy as np
+from hydra.utils import instantiate
+from omegaconf import OmegaConf
+from sklearn.model_selection import train_test_split
+
+from ..data_collector import FeatureTransformer
+from ..estimators.screen_point_estimator import multi_rmse
+
+
+def permutation_importance(estimator, X, y, n_repeats=3, seed=None):
+    """Growth of the RMSE of a fitted estimator when each feature column is shuffled, averaged over n_repeats."""
+    rng = np.random.default_rng(seed)
+    X = np.array(X, dtype=np.float64)
+    base = multi_rmse(y, estimator.predict(X))
+    scores = np.zeros(X.shape[1])
+    for j in range(X.shape[1]):
+        column = X[:, j].copy()
+        for _ in range(n_repeats):
+            X[:, j] = rng.permutation(column)
+            scores[j] += multi_rmse(y, estimator.predict(X)) - base
+        X[:, j] = column
+    return scores / n_repeats
+
+
+class FeatureSelection:
+    """Ranks the features of a dataset and picks the smallest top-ranked set within tolerance of the best
+    validation RMSE.
+
+    method is "importance" (the estimator's feature_importances, CatBoost only) or "permutation" (see
+    permutation_importance, measured on a validation part of the training rows). Every candidate set of sizes is
+    refitted and scored on the same validation rows, split from the training rows; only the selected set is refitted
+    on all training rows and scored on the held-out test rows. Features in keep are always selected.
+    """
+
+    def __init__(self, estimator_config, raw_columns, method="permutation", sizes=(10, 20, 40, 80), tolerance=0.02,
+                 keep=(), n_repeats=3, test_size=0.2, seed=None):
+        if method not in ("importance", "permutation"):
+            raise ValueError("Unknown method {}".format(method))
+        self.estimator_config = OmegaConf.create(estimator_config)
+        self.raw_columns = list(raw_columns)
+        self.method = method
+        self.sizes = sorted(sizes)
+        self.tolerance = tolerance
+        self.keep = list(keep)
+        self.n_repeats = n_repeats
+        self.test_size = test_size
+        self.seed = seed
+
+    def _fit(self, df, target_columns):
+        estimator = instantiate(self.estimator_config)
+        estimator.fit(df, target_columns)
+        return estimator
+
+    def rank(self, df, target_columns):
+        """Feature names from the most to the least important and their scores."""
+        features = [column for column in df.columns if column not in target_columns]
+        if self.method == "importance":
+            estimator = self._fit(df, target_columns)
+            if not hasattr(estimator, "feature_importances"):
+                raise ValueError("{} has no feature importances".format(type(estimator).__name__))
+            scores = np.asarray(estimator.feature_importances, dtype=np.float64)
+        else:
+            train, val = train_test_split(df, test_size=self.test_size, random_state=self.seed)
+            estimator = self._fit(train, target_columns)
+            scores = permutation_importance(estimator, val[features].values, val[target_columns].values,
+                                            self.n_repeats, self.seed)
+        order = np.argsort(-scores, kind="stable")
+        return [features[i] for i in order], scores[order]
+
+    def _evaluate(self, train, test, feature_names, target_columns, score="test_rmse"):
+        start = time.perf_counter()
+        estimator = self._fit(train[feature_names + target_columns], target_columns)
+        fit_seconds = time.perf_counter() - start
+
+        # per-frame cost: generating the features of one raw row and predicting on it
+        transformer = FeatureTransformer(self.raw_columns, feature_names)
+        raw_row = test[self.raw_columns].values[:1]
+        row = np.empty((1, transformer.num_features))
+        repeat = 200
+        start = time.perf_counter()
+        for _ in range(repeat):
+            estimator.predict(transformer.transform(raw_row, out=row))
+        row_seconds = (time.perf_counter() - start) / repeat
+
+        rmse = multi_rmse(test[target_columns].values, estimator.predict(test[feature_names].values))
+        return {"features": len(feature_names), "fit_seconds": fit_seconds, "row_us": row_seconds * 1e6,
+                score: rmse}
+
+    def run(self, df, target_columns):
+        missing = [column for column in self.raw_columns if column not in df.columns]
+        if missing:
+            raise ValueError("The dataset does not have the raw columns {}".format(missing))
+        train, test = train_test_split(df, test_size=self.test_size, random_state=self.seed)
+        # the size is chosen on validation rows, the test rows only score the chosen set
+        fit, val = train_test_split(train, test_size=self.test_size, random_state=self.seed)
+        ranking, scores = self.rank(fit, target_columns)
+        ranked = self.keep + [name for name in ranking if name not in self.keep]
+        all_features = [column for column in df.columns if column not in target_columns]
+
+        results = []
+        for size in [size for size in self.sizes if size < len(ranked)] + [len(ranked)]:
+            selected = set(ranked[:max(size, len(self.keep))])
+            # the schema keeps the column order of the dataset
+            feature_names = [name for name in all_features if name in selected]
+            results.append({**self._evaluate(fit, val, feature_names, target_columns, "val_rmse"),
+                            "feature_names": feature_names})
+
+        best_rmse = min(result["val_rmse"] for result in results)
+        selected = next(result for result in results if result["val_rmse"] <= best_rmse * (1 + self.tolerance))
+        return {
+            "method": self.method,
+            "feature_names": selected["feature_names"],
+            "test": self._evaluate(train, test, selected["feature_names"], target_columns),
+            "ranking": [{"feature": name, "score": float(score)} for name, score in zip(ranking, scores)],
+            "results": [{key: value for key, value in result.items() if key != "feature_names"}
+                        for result in results],
+        }
@@ -0,0 +1,116 @@
+import itertools
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from hydra.utils import get_class, instantiate
+from omegaconf import OmegaConf
+from sklearn.model_selection import KFold, train_test_split
+
+from ..estimators.screen_point_estimator import multi_rmse
+
+
+# per-worker state: the dataset, its folds (train, early stopping, scored rows) and the folds converted by each
+# estimator class
+_worker = {}
+
+
+def _init_worker(X, y, feature_names, folds):
+    _worker.update(X=X, y=y, feature_names=feature_names, folds=folds, prepared={})
+
+
+def _prepared_fold(estimator, fold):
+    key = (type(estimator).__name__, fold)
+    if key not in _worker["prepared"]:
+        train, early_stopping, val = _worker["folds"][fold]
+        X, y = _worker["X"], _worker["y"]
+        if estimator.EARLY_STOPPING:
+            # the scored fold must not pick the best iteration, a part of the training rows does
+            train, val = np.setdiff1d(train, early_stopping), early_stopping
+        _worker["prepared"][key] = (estimator.prepare_data(X[train], y[train]),
+                                    estimator.prepare_data(X[val], y[val]))
+    return _worker["prepared"][key]
+
+
+def _fit_fold(config, fold):
+    start = time.process_time()
+    estimator = instantiate(config)
+    estimator.feature_names = _worker["feature_names"]
+    estimator.fit_prepared(*_prepared_fold(estimator, fold))
+    _, _, val = _worker["folds"][fold]
+    score = multi_rmse(_worker["y"][val], estimator.predict(_worker["X"][val]))
+    return score, time.process_time() - start
+
+
+class HyperparameterSearch:
+    """K-fold cross-validated search over a grid (or random candidates of it) of estimator config values.
+
+    The estimator config is a hydra config with _target_ (see conf/screen_point_estimator), space maps dotted
+    config keys to lists of values. Estimators with early stopping stop on early_stopping_size of the training rows
+    of a fold, every estimator is scored on the rows of the fold.
+    """
+
+    def __init__(self, estimator_config, space, n_iter=None, n_folds=5, n_jobs=None, early_stopping_size=0.2,
+                 seed=None):
+        self.estimator_config = OmegaConf.create(estimator_config)
+        self.space = {key: list(values) for key, values in space.items()}
+        self.n_iter = n_iter
+        self.n_folds = n_folds
+        self.n_jobs = n_jobs or os.cpu_count()
+        self.early_stopping_size = early_stopping_size
+        self.seed = seed
+
+    def candidates(self):
+        keys = list(self.space)
+        grid = [dict(zip(keys, values)) for values in itertools.product(*self.space.values())]
+        if self.n_iter is not None and self.n_iter < len(grid):
+            grid = random.Random(self.seed).sample(grid, self.n_iter)
+        return grid
+
+    def _make_config(self, params, single_thread=False):
+        config = self.estimator_config.copy()
+        for key, value in params.items():
+            OmegaConf.update(config, key, value, force_add=True)
+        if single_thread:
+            # the parallelism comes from the pool, a fit must not spread over every core on its own
+            for key, value in get_class(config._target_).SINGLE_THREAD_PARAMS.items():
+                OmegaConf.update(config, key, value, force_add=True)
+        return OmegaConf.to_container(config)
+
+    def run(self, df, target_columns):
+        features = df.drop(columns=target_columns)
+        X, y = features.values, df[target_columns].values
+        folds = [(train, train_test_split(train, test_size=self.early_stopping_size, random_state=self.seed)[1], val)
+                 for train, val in KFold(self.n_folds, shuffle=True, random_state=self.seed).split(X)]
+        candidates = self.candidates()
+
+        start = time.perf_counter()
+        with ProcessPoolExecutor(self.n_jobs, initializer=_init_worker,
+                                 initargs=(X, y, list(features.columns), folds)) as executor:
+            futures = [[executor.submit(_fit_fold, self._make_config(params, self.n_jobs > 1), fold)
+                        for fold in range(self.n_folds)] for params in candidates]
+            results = []
+            for params, fold_futures in zip(candidates, futures):
+                scores, cpu_times = zip(*(future.result() for future in fold_futures))
+                results.append({
+                    "params": params,
+                    "val_rmse": float(np.mean(scores)),
+                    "val_rmse_std": float(np.std(scores)),
+                    "fold_val_rmse": [float(score) for score in scores],
+                    "cpu_seconds": float(sum(cpu_times)),
+                })
+        results.sort(key=lambda result: result["val_rmse"])
+
+        return {
+            "best_params": results[0]["params"],
+            "best_val_rmse": results[0]["val_rmse"],
+            "best_config": self._make_config(results[0]["params"]),
+            "candidates": len(candidates),
+            "folds": self.n_folds,
+            "workers": self.n_jobs,
+            "wall_seconds": time.perf_counter() - start,
+            "cpu_seconds": sum(result["cpu_seconds"] for result in results),
+            "results": results,
+        }
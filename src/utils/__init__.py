@@ -2,3 +2,4 @@ from .draw_detections import draw_detections
 from .resize_image import resize_image
 from .get_rectangle import get_rectangle
 from .get_distance import get_distance
+from .fps_counter import FpsCounter
@@ -0,0 +1,22 @@
+import time
+from collections import deque
+
+
+class FpsCounter:
+    """Events per second over a sliding window of the last window seconds."""
+
+    def __init__(self, window=2.0):
+        self.window = window
+        self._times = deque()
+
+    def tick(self, now=None):
+        now = time.perf_counter() if now is None else now
+        self._times.append(now)
+        while now - self._times[0] > self.window:
+            self._times.popleft()
+
+    @property
+    def fps(self):
+        if len(self._times) < 2:
+            return 0.0
+        return (len(self._times) - 1) / max(self._times[-1] - self._times[0], 1e-9)
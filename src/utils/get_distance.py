@@ -1,5 +1,4 @@
 from .get_rectangle import get_rectangle
-import pyrealsense2 as rs
 import cv2
 
 
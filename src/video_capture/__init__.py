@@ -1 +1,12 @@
-from .video_capture import VideoCapture
+from .frame_recorder import FrameRecorder, RecordingVideoCapture
+from .replay_video_capture import ReplayVideoCapture
+from .threaded_video_capture import ThreadedVideoCapture
+from .make_video_capture import make_video_capture
+
+
+def __getattr__(name):
+    # VideoCapture needs the RealSense SDK, it is imported on first use so the package works without it
+    if name == "VideoCapture":
+        from .video_capture import VideoCapture
+        return VideoCapture
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
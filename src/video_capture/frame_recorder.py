@@ -0,0 +1,72 @@
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+
+
+class FrameRecorder:
+    """Appends color/depth frames and their timestamps to raw files, which ReplayVideoCapture memory-maps."""
+    VERSION = 1
+    META = "meta.json"
+    TIMESTAMPS = "timestamps.bin"
+    STREAMS = ("color", "depth")
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.frames = 0
+        self._meta = None
+        self._files = {}
+
+    def _open(self, frames):
+        self._meta = {"version": self.VERSION, "frames": 0}
+        for name, frame in zip(self.STREAMS, frames):
+            self._meta[name] = None if frame is None else {"dtype": frame.dtype.str, "shape": list(frame.shape)}
+        for name in (*self.STREAMS, "timestamps"):
+            self._files[name] = open(self.path / (name + ".bin"), "wb")
+        self._write_meta()
+
+    def _write_meta(self):
+        # the frame count is also recoverable from the file sizes if the session was interrupted
+        self._meta["frames"] = self.frames
+        with open(self.path / self.META, "w") as f:
+            json.dump(self._meta, f)
+
+    def write(self, color_frame, depth_frame=None, timestamp=None):
+        if depth_frame is not None:
+            depth_frame = depth_frame.astype(np.float32, copy=False)
+        if self._meta is None:
+            self._open((color_frame, depth_frame))
+        for name, frame in zip(self.STREAMS, (color_frame, depth_frame)):
+            if self._meta[name] is not None:
+                self._files[name].write(np.ascontiguousarray(frame).tobytes())
+        timestamp = time.time() if timestamp is None else timestamp
+        self._files["timestamps"].write(np.float64(timestamp).tobytes())
+        self.frames += 1
+
+    def close(self):
+        if not self._files:
+            return
+        for file in self._files.values():
+            file.close()
+        self._files = {}
+        self._write_meta()
+
+    def __del__(self):
+        self.close()
+
+
+class RecordingVideoCapture:
+    def __init__(self, source, recorder: FrameRecorder):
+        self.source = source
+        self.recorder = recorder
+
+    def get_frame(self):
+        color_frame, depth_frame = self.source.get_frame()
+        if color_frame is not None:
+            self.recorder.write(color_frame, depth_frame)
+        return color_frame, depth_frame
+
+    def __del__(self):
+        self.recorder.close()
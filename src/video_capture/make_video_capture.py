@@ -0,0 +1,34 @@
+import logging as log
+
+from omegaconf import DictConfig
+
+from .frame_recorder import FrameRecorder, RecordingVideoCapture
+from .replay_video_capture import ReplayVideoCapture
+from .threaded_video_capture import ThreadedVideoCapture
+
+
+def make_video_capture(args: DictConfig, frames_held=1):
+    """frames_held is the number of returned frames the consumer still reads, e.g. the frames in flight of a pipelined
+    frame processor."""
+    if args.source == "realsense":
+        from .video_capture import VideoCapture
+        video_capture = VideoCapture()
+    elif args.source == "webcam":
+        from .my_video_capture import MyVideoCapture
+        video_capture = MyVideoCapture(args.video_source)
+    elif args.source == "replay":
+        video_capture = ReplayVideoCapture(args.path, realtime=args.realtime, loop=args.loop)
+    else:
+        raise ValueError("Unknown video source {}".format(args.source))
+
+    if args.get("record_path"):
+        video_capture = RecordingVideoCapture(video_capture, FrameRecorder(args.record_path))
+    if args.get("threaded"):
+        # a returned frame stays valid for ring_size - 2 further get_frame calls, after that its slot is overwritten
+        ring_size = args.get("ring_size", 3)
+        if ring_size < frames_held + 2:
+            log.warning('ring_size {} is too small for {} frames held, using {}'.format(
+                ring_size, frames_held, frames_held + 2))
+            ring_size = frames_held + 2
+        video_capture = ThreadedVideoCapture(video_capture, ring_size)
+    return video_capture
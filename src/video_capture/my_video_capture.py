@@ -2,6 +2,9 @@ import cv2
 
 
 class MyVideoCapture:
+    # get_frame can convert into a given buffer, see ThreadedVideoCapture
+    SUPPORTS_OUT = True
+
     def __init__(self, video_source=0):
         # Open the video source
         self.vid = cv2.VideoCapture(video_source)
@@ -12,12 +15,12 @@ class MyVideoCapture:
         self.width = self.vid.get(cv2.CAP_PROP_FRAME_WIDTH)
         self.height = self.vid.get(cv2.CAP_PROP_FRAME_HEIGHT)
 
-    def get_frame(self):
+    def get_frame(self, color_out=None, depth_out=None):
         if self.vid.isOpened():
             ret, frame = self.vid.read()
             if ret:
                 # Return a boolean success flag and the current frame converted to BGR
-                return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB), None
+                return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=color_out), None
             else:
                 return None, None
         else:
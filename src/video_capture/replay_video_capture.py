@@ -0,0 +1,70 @@
+import json
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+
+from .frame_recorder import FrameRecorder
+
+
+class ReplayVideoCapture:
+    def __init__(self, path, realtime=True, loop=False):
+        self.path = Path(path)
+        with open(self.path / FrameRecorder.META) as f:
+            meta = json.load(f)
+        if meta["version"] != FrameRecorder.VERSION:
+            raise ValueError("Unsupported recording version {}".format(meta["version"]))
+
+        self.timestamps = self._map("timestamps", {"dtype": "<f8", "shape": []})
+        self.color_frames = self._map("color", meta["color"])
+        self.depth_frames = self._map("depth", meta["depth"]) if meta["depth"] is not None else None
+        self.frames = min(len(frames) for frames in (self.timestamps, self.color_frames, self.depth_frames)
+                          if frames is not None)
+        if self.frames == 0:
+            raise ValueError("The recording {} is empty".format(path))
+
+        self.height, self.width = self.color_frames.shape[1:3]
+        self.realtime = realtime
+        self.loop = loop
+        self._index = -1
+        self._start = None
+
+    def _map(self, name, stream):
+        # copy-on-write mapping: frames are not copied on read, and drawing on them never touches the file
+        path = self.path / (name + ".bin")
+        dtype = np.dtype(stream["dtype"])
+        frame_size = dtype.itemsize * int(np.prod(stream["shape"]))
+        frames = os.path.getsize(path) // frame_size
+        if frames == 0:
+            return np.empty((0, *stream["shape"]), dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode="c", shape=(frames, *stream["shape"]))
+
+    def _next_index(self):
+        if not self.realtime:
+            return self._index + 1
+
+        now = time.perf_counter()
+        if self._start is None:
+            self._start = now
+        elapsed = self.timestamps[0] + now - self._start
+        # the newest frame that is due, late frames are skipped like a live camera would do
+        index = int(np.searchsorted(self.timestamps[:self.frames], elapsed, side="right")) - 1
+        if index <= self._index and index < self.frames - 1:
+            return None
+        return max(index, self._index + 1)
+
+    def get_frame(self):
+        index = self._next_index()
+        if index is None:
+            return None, None
+        if index >= self.frames:
+            if not self.loop:
+                return None, None
+            self._index = -1
+            self._start = None
+            index = self._next_index()
+
+        self._index = index
+        depth_frame = self.depth_frames[index] if self.depth_frames is not None else None
+        return self.color_frames[index], depth_frame
@@ -0,0 +1,119 @@
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+
+class ThreadedVideoCapture:
+    """Reads a video source on a producer thread into a ring of preallocated color/depth buffers.
+
+    get_frame never blocks: it returns the newest captured frame, or (None, None) if there is no new one since the
+    previous call. A returned frame stays valid for ring_size - 2 further get_frame calls, after that its buffer is
+    reused. Frames captured but replaced by a newer one before being read are counted as dropped.
+    """
+    _IDLE_SLEEP = 0.001
+
+    def __init__(self, source, ring_size=3):
+        if ring_size < 3:
+            raise ValueError("ring_size must be at least 3, got {}".format(ring_size))
+        self.source = source
+        self.ring_size = ring_size
+        # sources with SUPPORTS_OUT write their conversions straight into the ring buffers
+        self._writes_into = getattr(source, "SUPPORTS_OUT", False)
+        self._color = None
+        self._depth = None
+        self._timestamps = [0.0] * ring_size
+        self._latest = None
+        self._held = deque(maxlen=ring_size - 2)
+        self._lock = threading.Lock()
+
+        self.captured = 0
+        self.consumed = 0
+        self.dropped = 0
+        self.last_latency = 0.0
+        self._latency_sum = 0.0
+        self.max_latency = 0.0
+
+        self._error = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="video-capture", daemon=True)
+        self._thread.start()
+
+    def _allocate(self, color_frame, depth_frame):
+        self._color = np.empty((self.ring_size, *color_frame.shape), dtype=color_frame.dtype)
+        if depth_frame is not None:
+            self._depth = np.empty((self.ring_size, *depth_frame.shape), dtype=depth_frame.dtype)
+
+    def _free_slot(self):
+        with self._lock:
+            busy = {self._latest, *self._held}
+        return next(slot for slot in range(self.ring_size) if slot not in busy)
+
+    def _capture(self, slot):
+        if self._color is None or not self._writes_into:
+            color_frame, depth_frame = self.source.get_frame()
+            if color_frame is None:
+                return False
+            if self._color is None:
+                self._allocate(color_frame, depth_frame)
+            self._color[slot] = color_frame
+            if self._depth is not None:
+                self._depth[slot] = depth_frame
+            return True
+        color_frame, _ = self.source.get_frame(color_out=self._color[slot],
+                                               depth_out=None if self._depth is None else self._depth[slot])
+        return color_frame is not None
+
+    def _run(self):
+        try:
+            while not self._stop.is_set():
+                # the slot is neither the newest frame nor held by the consumer, so nobody reads it while it is written
+                slot = self._free_slot()
+                if not self._capture(slot):
+                    time.sleep(self._IDLE_SLEEP)
+                    continue
+                self._timestamps[slot] = time.perf_counter()
+                with self._lock:
+                    if self._latest is not None:
+                        self.dropped += 1
+                    self._latest = slot
+                    self.captured += 1
+        except Exception as e:
+            self._error = e
+
+    def get_frame(self):
+        if self._error is not None:
+            raise RuntimeError("Video capture failed") from self._error
+        with self._lock:
+            slot = self._latest
+            if slot is None:
+                return None, None
+            self._latest = None
+            self._held.append(slot)
+
+        latency = time.perf_counter() - self._timestamps[slot]
+        self.consumed += 1
+        self.last_latency = latency
+        self._latency_sum += latency
+        self.max_latency = max(self.max_latency, latency)
+        return self._color[slot], None if self._depth is None else self._depth[slot]
+
+    @property
+    def stats(self):
+        return {
+            "captured": self.captured,
+            "consumed": self.consumed,
+            "dropped": self.dropped,
+            "latency_ms": self.last_latency * 1e3,
+            "mean_latency_ms": self._latency_sum / max(self.consumed, 1) * 1e3,
+            "max_latency_ms": self.max_latency * 1e3,
+        }
+
+    def close(self):
+        self._stop.set()
+        if self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def __del__(self):
+        self.close()
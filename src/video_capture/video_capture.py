@@ -4,6 +4,9 @@ import numpy as np
 
 
 class VideoCapture:
+    # get_frame can convert into given buffers, see ThreadedVideoCapture
+    SUPPORTS_OUT = True
+
     def __init__(self):
         self.pipeline = rs.pipeline()
         self.config = rs.config()
@@ -34,7 +37,7 @@ class VideoCapture:
         elif not found_depth:
             raise Exception("The application requires camera with Stereo sensor")
 
-    def get_frame(self):
+    def get_frame(self, color_out=None, depth_out=None):
         frames = self.pipeline.wait_for_frames()
         aligned_frames = self.align.process(frames)
         depth_frame = aligned_frames.get_depth_frame()
@@ -42,8 +45,8 @@ class VideoCapture:
         if not depth_frame or not color_frame:
             return None, None
 
-        depth_image = np.asanyarray(depth_frame.get_data()) * self.depth_scale  # (h, w)
-        color_image = cv2.cvtColor(np.asanyarray(color_frame.get_data()), cv2.COLOR_RGB2BGR)  # (h, w, c)
+        depth_image = np.multiply(np.asanyarray(depth_frame.get_data()), self.depth_scale, out=depth_out)  # (h, w)
+        color_image = cv2.cvtColor(np.asanyarray(color_frame.get_data()), cv2.COLOR_RGB2BGR, dst=color_out)  # (h, w, c)
         return color_image, depth_image
 
     def __del__(self):